@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import logging
 
@@ -7,6 +8,13 @@ from database.database import get_db
 from database.models import Category
 from dto.category_dto import CategoryListDTO
 from dto.response_dto import SuccessResponseDTO
+from services.response_cache import (
+    response_cache,
+    to_json_bytes,
+    CATEGORIES_TAG,
+)
+from services.compression import json_response
+from services.conditional import cached_response, etag_headers
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -21,7 +29,7 @@ router = APIRouter(prefix="/api/categories", tags=["categories"])
     response_model=SuccessResponseDTO,
     summary="Get all categories",
 )
-async def get_all_categories(db: Session = Depends(get_db)):
+async def get_all_categories(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Get all categories.
 
@@ -30,7 +38,13 @@ async def get_all_categories(db: Session = Depends(get_db)):
     try:
         logger.info("Fetching all categories")
 
-        categories = db.query(Category).order_by(Category.id).all()
+        cached, etag, key = await cached_response(db, request, CATEGORIES_TAG)
+        if cached is not None:
+            return cached
+
+        categories = (
+            (await db.execute(select(Category).order_by(Category.id))).scalars().all()
+        )
 
         categories_list = [
             CategoryListDTO.model_validate(category) for category in categories
@@ -38,9 +52,15 @@ async def get_all_categories(db: Session = Depends(get_db)):
 
         logger.info(f"Found {len(categories_list)} categories")
 
-        return SuccessResponseDTO(
-            message=f"Found {len(categories_list)} categories", data=categories_list
+        body = to_json_bytes(
+            SuccessResponseDTO(
+                message=f"Found {len(categories_list)} categories",
+                data=categories_list,
+            )
         )
+        response_cache.set(key, body, tags=[CATEGORIES_TAG])
+
+        return await json_response(request, body, etag_headers(etag), key)
 
     except Exception as e:
         logger.error(f"Error fetching categories: {str(e)}")
@@ -1,17 +1,46 @@
+import asyncio
+import hashlib
 import os
+import tempfile
 import uuid
+import weakref
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Query,
+    Request,
+)
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import RedirectResponse, Response
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
-from PIL import Image as PILImage
-import io
 
 from database.database import get_db
-from database.models import Image
+from database.models import Image, ImageVariant
 from dto.response_dto import SuccessResponseDTO
+from services.image_pool import (
+    image_pool,
+    PoolSaturatedError,
+    IMAGE_POOL_RETRY_AFTER_SECONDS,
+)
+from services.image_files import image_files, image_response, ImageFile
+from services.storage import storage
+from services.image_processing import (
+    inspect_image,
+    generate_variants,
+    InvalidImageError,
+    IMAGE_VARIANTS,
+    IMAGE_VARIANT_FORMAT,
+    VARIANT_EXTENSIONS,
+)
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -20,12 +49,245 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/images", tags=["images"])
 
-IMAGE_STORAGE_LOCATION = os.getenv("IMAGE_STORAGE_LOCATION", "./images")
-UPLOAD_DIR = Path(IMAGE_STORAGE_LOCATION)
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 MAX_FILE_SIZE = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 256 * 1024
+IMAGE_REDIRECT_MAX_AGE_SECONDS = int(os.getenv("IMAGE_REDIRECT_MAX_AGE_SECONDS", "60"))
+REDIRECT_CACHE_CONTROL = f"public, max-age={IMAGE_REDIRECT_MAX_AGE_SECONDS}"
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB",
+    )
+
+
+async def _spool_upload(file: UploadFile) -> Tuple[Path, str]:
+    """
+    Copy the upload into a temporary file in the storage work directory in
+    fixed-size chunks, enforcing MAX_FILE_SIZE as it goes, and return the
+    file with the BLAKE2b hash of its contents. For local storage the work
+    directory is on the same filesystem, so the file is renamed into place.
+    """
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        logger.warning(f"File too large: {file.size} bytes")
+        raise _file_too_large()
+
+    fd, temp_name = tempfile.mkstemp(dir=storage.work_dir, suffix=".part")
+    temp_path = Path(temp_name)
+    digest = hashlib.blake2b(digest_size=32)
+    size = 0
+
+    def write(chunk: bytes) -> None:
+        out.write(chunk)
+        digest.update(chunk)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    logger.warning(f"File too large: over {MAX_FILE_SIZE} bytes")
+                    raise _file_too_large()
+                await run_in_threadpool(write, chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path, digest.hexdigest()
+
+
+def _remove_files(paths: Iterable[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _image_data(image: Image, variants: Iterable[ImageVariant]) -> dict:
+    return {
+        "image_id": image.id,
+        "location": image.location,
+        "filename": image.filename,
+        "alt_text": image.alt_text,
+        "variants": _variant_locations(variants),
+    }
+
+
+async def _uploaded_image_response(
+    db: AsyncSession, image: Image, message: str
+) -> SuccessResponseDTO:
+    # The upload is already stored; a variant that cannot be generated
+    # now is generated on its first request instead.
+    variants = {}
+    try:
+        variants = await _ensure_variants(db, image, IMAGE_VARIANTS)
+    except Exception as e:
+        logger.warning(f"Deferring variants for image {image.id}: {str(e)}")
+    return SuccessResponseDTO(
+        message=message, data=_image_data(image, variants.values())
+    )
+
+
+# One lock per image so concurrent requests for a missing variant wait for
+# a single generation instead of each queueing work in the image pool.
+_variant_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Image processing is busy, please retry shortly",
+        headers={"Retry-After": str(IMAGE_POOL_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _variant_filename(filename: str, name: str) -> str:
+    extension = VARIANT_EXTENSIONS[IMAGE_VARIANT_FORMAT]
+    return f"{Path(filename).stem}_{name}{extension}"
+
+
+def _variant_locations(variants: Iterable[ImageVariant]) -> Dict[str, str]:
+    return {variant.name: f"/api/images/{variant.filename}" for variant in variants}
+
+
+def _select_variant(variant: Optional[str], w: Optional[int]) -> Optional[str]:
+    """
+    Map the ?variant= / ?w= query parameters to a configured variant name.
+    A width picks the smallest variant at least that wide, falling back to
+    the largest one. Returns None when the original was asked for.
+    """
+    if variant is not None:
+        if variant not in IMAGE_VARIANTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown variant. Available variants: {', '.join(IMAGE_VARIANTS)}",
+            )
+        return variant
+    if w is not None and IMAGE_VARIANTS:
+        by_width = sorted(IMAGE_VARIANTS.items(), key=lambda item: item[1])
+        for name, width in by_width:
+            if width >= w:
+                return name
+        return by_width[-1][0]
+    return None
+
+
+async def _render_variants(
+    source_file: ImageFile, names: List[str]
+) -> List[Tuple[str, str, int, int]]:
+    """
+    Render variants of an image in the image pool and store them. Returns
+    (name, filename, width, height) for each one. The source is fetched to
+    the work directory first when storage has no local copy of it.
+    """
+    token = uuid.uuid4().hex
+    work_dir = storage.work_dir
+    source_path = source_file.path
+    temp_paths = []
+    if source_path is None:
+        downloaded = work_dir / f"{token}-{source_file.key}.part"
+        temp_paths.append(downloaded)
+        await storage.download(source_file.key, downloaded)
+        source_path = str(downloaded)
+
+    filenames = {name: _variant_filename(source_file.key, name) for name in names}
+    rendered = {name: work_dir / f"{token}-{filenames[name]}.part" for name in names}
+    temp_paths.extend(rendered.values())
+    try:
+        targets = [(name, IMAGE_VARIANTS[name], str(rendered[name])) for name in names]
+        generated = await image_pool.run(generate_variants, source_path, targets)
+        for name, _, _ in generated:
+            await storage.put_file(rendered[name], filenames[name])
+    finally:
+        await run_in_threadpool(_remove_files, temp_paths)
+    return [(name, filenames[name], width, height) for name, width, height in generated]
+
+
+async def _ensure_variants(
+    db: AsyncSession, image: Image, names: Iterable[str]
+) -> Dict[str, ImageVariant]:
+    """
+    Return the requested variants of an image, generating and recording
+    any that are missing. Generation runs in the image pool and raises
+    PoolSaturatedError when it is full.
+    """
+    image_id, source = image.id, image.filename
+    query = select(ImageVariant).where(ImageVariant.image_id == image_id)
+
+    async def load() -> Dict[str, ImageVariant]:
+        return {v.name: v for v in (await db.execute(query)).scalars().all()}
+
+    variants = await load()
+    if all(name in variants for name in names):
+        return variants
+
+    lock = _variant_locks.setdefault(image_id, asyncio.Lock())
+    async with lock:
+        variants = await load()
+        missing = [name for name in names if name not in variants]
+        if not missing:
+            return variants
+
+        source_file = await image_files.lookup(source)
+        if source_file is None:
+            raise FileNotFoundError(f"Image file not found: {source}")
+        for name, filename, width, height in await _render_variants(
+            source_file, missing
+        ):
+            await image_files.add(filename)
+            db.add(
+                ImageVariant(
+                    image_id=image_id,
+                    name=name,
+                    filename=filename,
+                    width=width,
+                    height=height,
+                    format=IMAGE_VARIANT_FORMAT,
+                )
+            )
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker process recorded the same variant; its file was
+            # replaced atomically with identical output, so keep its row.
+            await db.rollback()
+        logger.info(f"Generated variants {missing} for image {image_id}")
+        return await load()
+
+
+async def _image_by_hash(db: AsyncSession, content_hash: str) -> Optional[Image]:
+    query = select(Image).where(Image.content_hash == content_hash)
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+async def _redirect_to_file(
+    db: AsyncSession,
+    image: Image,
+    variant: Optional[str],
+    w: Optional[int],
+) -> Response:
+    """
+    Redirect to the file URL of an image or of the variant asked for.
+    Only file URLs, named by content hash, are cached as immutable; the
+    image an id or a width points at changes when an id is reused after
+    gc-images or the variants are reconfigured, so the redirect itself
+    is cached briefly.
+    """
+    name = _select_variant(variant, w)
+    filename = image.filename
+    if name is not None:
+        try:
+            variants = await _ensure_variants(db, image, [name])
+        except PoolSaturatedError as e:
+            logger.warning(f"Cannot generate variant {name}: {str(e)}")
+            raise _pool_busy()
+        filename = variants[name].filename
+    return RedirectResponse(
+        f"/api/images/{filename}",
+        status_code=status.HTTP_302_FOUND,
+        headers={"Cache-Control": REDIRECT_CACHE_CONTROL},
+    )
 
 
 @router.post(
@@ -37,8 +299,10 @@ MAX_FILE_SIZE = 10 * 1024 * 1024
 async def upload_image(
     file: UploadFile = File(...),
     alt_text: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
+    temp_path = None
+    stored_key = None
     try:
         logger.info(f"Received upload request for file: {file.filename}")
 
@@ -50,29 +314,34 @@ async def upload_image(
                 detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}",
             )
 
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            logger.warning(f"File too large: {len(contents)} bytes")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB",
+        temp_path, content_hash = await _spool_upload(file)
+
+        existing = await _image_by_hash(db, content_hash)
+        if existing is not None:
+            logger.info(f"Duplicate upload of image {existing.id}")
+            return await _uploaded_image_response(
+                db, existing, "Image already uploaded"
             )
 
         try:
-            pil_image = PILImage.open(io.BytesIO(contents))
-            pil_image.verify()
-        except Exception as e:
+            await image_pool.run(inspect_image, str(temp_path))
+        except PoolSaturatedError as e:
+            logger.warning(f"Rejecting upload: {str(e)}")
+            raise _pool_busy()
+        except InvalidImageError as e:
             logger.warning(f"Invalid image file: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid image file",
             )
 
-        filename = f"{uuid.uuid4()}{file_ext}"
-        file_path = UPLOAD_DIR / filename
-
-        pil_image = PILImage.open(io.BytesIO(contents))
-        pil_image.save(file_path, format=pil_image.format)
+        # The original bytes are stored as uploaded, named by their hash;
+        # nothing is re-encoded.
+        filename = f"{content_hash}{file_ext}"
+        if await storage.put_file(temp_path, filename):
+            stored_key = filename
+        temp_path = None
+        await image_files.add(filename)
 
         location = f"/api/images/{filename}"
 
@@ -80,68 +349,88 @@ async def upload_image(
             location=location,
             filename=filename,
             alt_text=alt_text,
+            content_hash=content_hash,
         )
 
         db.add(db_image)
-        db.commit()
-        db.refresh(db_image)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent upload of the same bytes won the unique index.
+            await db.rollback()
+            existing = await _image_by_hash(db, content_hash)
+            if existing is None:
+                raise
+            if existing.filename != filename and stored_key is not None:
+                await storage.delete(stored_key)
+                image_files.discard(stored_key)
+            logger.info(f"Duplicate upload of image {existing.id}")
+            return await _uploaded_image_response(
+                db, existing, "Image already uploaded"
+            )
+        await db.refresh(db_image)
 
         logger.info(f"Image uploaded successfully with ID: {db_image.id}")
 
-        return SuccessResponseDTO(
-            message="Image uploaded successfully",
-            data={
-                "image_id": db_image.id,
-                "location": db_image.location,
-                "filename": db_image.filename,
-                "alt_text": db_image.alt_text,
-            },
+        return await _uploaded_image_response(
+            db, db_image, "Image uploaded successfully"
         )
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error uploading image: {str(e)}")
-        db.rollback()
+        await db.rollback()
+        if stored_key is not None:
+            await storage.delete(stored_key)
+            image_files.discard(stored_key)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload image: {str(e)}",
         )
+    finally:
+        if temp_path is not None:
+            temp_path.unlink(missing_ok=True)
 
 
 @router.get(
     "/{filename}",
     summary="Get image by filename",
 )
-async def get_image(filename: str):
+async def get_image(
+    request: Request,
+    filename: str,
+    variant: Optional[str] = Query(None, description="Named size variant"),
+    w: Optional[int] = Query(None, ge=1, description="Desired width in pixels"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
         logger.info(f"Fetching image: {filename}")
 
-        file_path = UPLOAD_DIR / filename
-
-        if not file_path.exists():
+        if variant is not None or w is not None:
+            image = (
+                await db.execute(select(Image).where(Image.filename == filename))
+            ).scalar_one_or_none()
+            if image is None:
+                logger.warning(f"Image not found: {filename}")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Image not found",
+                )
+            return await _redirect_to_file(db, image, variant, w)
+
+        image_file = await image_files.lookup(filename)
+
+        if image_file is None:
             logger.warning(f"Image not found: {filename}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Image not found",
             )
 
-        file_ext = Path(filename).suffix.lower()
-        media_type = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-        }.get(file_ext, "application/octet-stream")
-
         logger.info(f"Image retrieved successfully: {filename}")
 
-        return FileResponse(
-            path=str(file_path),
-            media_type=media_type,
-            filename=filename,
-        )
+        return image_response(request, image_file, filename)
 
     except HTTPException:
         raise
@@ -158,11 +447,11 @@ async def get_image(filename: str):
     response_model=SuccessResponseDTO,
     summary="Get image metadata by ID",
 )
-async def get_image_info(image_id: int, db: Session = Depends(get_db)):
+async def get_image_info(image_id: int, db: AsyncSession = Depends(get_db)):
     try:
         logger.info(f"Fetching image info for ID: {image_id}")
 
-        image = db.query(Image).filter(Image.id == image_id).first()
+        image = await db.get(Image, image_id)
 
         if not image:
             logger.warning(f"Image with ID {image_id} not found")
@@ -171,6 +460,14 @@ async def get_image_info(image_id: int, db: Session = Depends(get_db)):
                 detail=f"Image with ID {image_id} not found",
             )
 
+        variants = (
+            await db.execute(
+                select(ImageVariant)
+                .where(ImageVariant.image_id == image.id)
+                .order_by(ImageVariant.width)
+            )
+        ).scalars()
+
         return SuccessResponseDTO(
             message="Image info retrieved successfully",
             data={
@@ -178,7 +475,17 @@ async def get_image_info(image_id: int, db: Session = Depends(get_db)):
                 "location": image.location,
                 "filename": image.filename,
                 "alt_text": image.alt_text,
+                "content_hash": image.content_hash,
                 "created_at": image.created_at,
+                "variants": {
+                    variant.name: {
+                        "location": f"/api/images/{variant.filename}",
+                        "width": variant.width,
+                        "height": variant.height,
+                        "format": variant.format,
+                    }
+                    for variant in variants
+                },
             },
         )
 
@@ -196,11 +503,16 @@ async def get_image_info(image_id: int, db: Session = Depends(get_db)):
     "/by-id/{image_id}",
     summary="Get image by ID",
 )
-async def get_image_by_id(image_id: int, db: Session = Depends(get_db)):
+async def get_image_by_id(
+    image_id: int,
+    variant: Optional[str] = Query(None, description="Named size variant"),
+    w: Optional[int] = Query(None, ge=1, description="Desired width in pixels"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
         logger.info(f"Fetching image with ID: {image_id}")
 
-        image = db.query(Image).filter(Image.id == image_id).first()
+        image = await db.get(Image, image_id)
 
         if not image:
             logger.warning(f"Image with ID {image_id} not found")
@@ -209,31 +521,9 @@ async def get_image_by_id(image_id: int, db: Session = Depends(get_db)):
                 detail="Image not found",
             )
 
-        file_path = UPLOAD_DIR / image.filename
-
-        if not file_path.exists():
-            logger.warning(f"Image file not found: {image.filename}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Image file not found",
-            )
-
-        file_ext = Path(image.filename).suffix.lower()
-        media_type = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-        }.get(file_ext, "application/octet-stream")
-
         logger.info(f"Image retrieved successfully: {image.filename}")
 
-        return FileResponse(
-            path=str(file_path),
-            media_type=media_type,
-            filename=image.filename,
-        )
+        return await _redirect_to_file(db, image, variant, w)
 
     except HTTPException:
         raise
@@ -1,22 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Literal, Optional, Union
 import logging
+import orjson
 from datetime import datetime
 
-from database.database import get_db
+from database.database import get_db, SessionLocal
 from database.models import News, Image, Category
+from database.pagination import paginate
+from database.feeds import feed_page, update_feeds, NEWEST_FEED
+from database import search as search_index
+from database.ingest import (
+    existing_references,
+    feed_articles,
+    upsert_news_batch,
+    NEWS_BULK_BATCH_SIZE,
+    NEWS_BULK_MAX_ITEMS,
+)
+from database.queries import (
+    news_titles_query,
+    news_details_query,
+    top_news_per_category_query,
+    news_created_after_query,
+    in_category,
+    CATEGORY_ORDER,
+)
+from database.versions import bump_versions
+from dependencies import get_pagination, get_search_pagination
+from services.trigram_index import title_index, fuzzy_search_news
+from services.response_cache import (
+    response_cache,
+    category_tag,
+    JSON_MEDIA_TYPE,
+    NEWEST_TAG,
+)
+from services.serialization import (
+    success_json,
+    paginated_json,
+    news_titles_data,
+    search_results_data,
+    news_list_items_data,
+    news_detail_data,
+)
+from services.live_feed import (
+    live_feed,
+    news_event,
+    NewsEvent,
+    Subscription,
+    LiveFeedFullError,
+    LIVE_FEED_HEARTBEAT_SECONDS,
+    LIVE_FEED_REPLAY_LIMIT,
+)
+from services.conditional import (
+    cached_response,
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    etag_headers,
+)
+from services.compression import json_response
+from services.worker_sync import worker_sync
 from dto.news_dto import (
     CreateNewsDTO,
-    NewsTitleDTO,
-    NewsListItemDTO,
-    NewsDetailDTO,
     MultipleCategoriesRequestDTO,
     PaginationDTO,
-    CategoryInfoDTO,
 )
-from dto.response_dto import SuccessResponseDTO, ErrorResponseDTO
+from dto.response_dto import (
+    SuccessResponseDTO,
+    PaginatedResponseDTO,
+    ErrorResponseDTO,
+)
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -25,6 +90,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_RETRY_MS = 3000
+SSE_HEARTBEAT = b": keepalive\n\n"
+WS_HEARTBEAT = '{"type":"heartbeat"}'
+
 
 @router.post(
     "/",
@@ -32,12 +104,19 @@ router = APIRouter(prefix="/api/news", tags=["news"])
     status_code=status.HTTP_201_CREATED,
     summary="Create a new news article",
 )
-async def create_news(news_data: CreateNewsDTO, db: Session = Depends(get_db)):
+async def create_news(
+    news_data: CreateNewsDTO, response: Response, db: AsyncSession = Depends(get_db)
+):
+    """
+    Create a news article. An article with an `external_id` that was
+    already created from the same `source` is updated in place instead,
+    so a redelivered article never creates a duplicate.
+    """
     try:
         logger.info(f"Creating new news article: {news_data.title}")
 
         if news_data.image_id is not None:
-            image = db.query(Image).filter(Image.id == news_data.image_id).first()
+            image = await db.get(Image, news_data.image_id)
             if not image:
                 logger.warning(f"Image ID {news_data.image_id} not found")
                 raise HTTPException(
@@ -46,7 +125,13 @@ async def create_news(news_data: CreateNewsDTO, db: Session = Depends(get_db)):
                 )
 
         categories = (
-            db.query(Category).filter(Category.id.in_(news_data.category_ids)).all()
+            (
+                await db.execute(
+                    select(Category).where(Category.id.in_(news_data.category_ids))
+                )
+            )
+            .scalars()
+            .all()
         )
         if len(categories) != len(news_data.category_ids):
             found_ids = {c.id for c in categories}
@@ -57,28 +142,54 @@ async def create_news(news_data: CreateNewsDTO, db: Session = Depends(get_db)):
                 detail=f"Categories with IDs {missing_ids} not found",
             )
 
-        db_news = News(
-            title=news_data.title,
-            description=news_data.description,
-            short_description=news_data.short_description,
-            source=news_data.source,
-            image_id=news_data.image_id,
-            timestamp=datetime.utcnow(),
-            categories=categories,
+        timestamp = datetime.utcnow()
+        (stored,), replaced_categories = await upsert_news_batch(
+            db, [news_data], timestamp
+        )
+        await update_feeds(
+            db,
+            feed_articles([news_data], [stored]),
+            [] if stored.created else [stored.id],
         )
 
-        db.add(db_news)
-        db.commit()
-        db.refresh(db_news)
+        category_ids = {c.id for c in categories} | replaced_categories
+        feed_tags = [NEWEST_TAG, *(category_tag(c) for c in sorted(category_ids))]
+
+        await bump_versions(db, *feed_tags)
+        if stored.created:
+            worker_sync.mark_local([stored.id])
+        try:
+            await db.commit()
+        except Exception:
+            worker_sync.unmark_local([stored.id])
+            raise
+        title_index.add(stored.id, news_data.title)
+        response_cache.invalidate(*feed_tags)
+        if stored.created:
+            live_feed.publish(
+                [
+                    news_event(
+                        stored.id,
+                        news_data.title,
+                        news_data.short_description,
+                        news_data.image_id,
+                        timestamp,
+                        news_data.category_ids,
+                    )
+                ]
+            )
 
-        logger.info(f"News article created successfully with ID: {db_news.id}")
+        action = "created" if stored.created else "updated"
+        if not stored.created:
+            response.status_code = status.HTTP_200_OK
+        logger.info(f"News article {action} successfully with ID: {stored.id}")
 
         return SuccessResponseDTO(
-            message="News article created successfully",
+            message=f"News article {action} successfully",
             data={
-                "id": db_news.id,
-                "title": db_news.title,
-                "created_at": db_news.created_at,
+                "id": stored.id,
+                "title": news_data.title,
+                "created_at": stored.created_at,
             },
         )
 
@@ -86,27 +197,234 @@ async def create_news(news_data: CreateNewsDTO, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         logger.error(f"Error creating news article: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create news article: {str(e)}",
         )
 
 
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _too_many_items() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Too many articles. Maximum per request: {NEWS_BULK_MAX_ITEMS}",
+    )
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    yield buffer
+
+
+async def _read_bulk_items(request: Request) -> List[Union[CreateNewsDTO, str]]:
+    """
+    Parse a bulk request body into one entry per article: the validated
+    DTO, or the reason it was rejected. NDJSON bodies are parsed line by
+    line as they arrive; anything else must be a JSON array.
+    """
+    items: List[Union[CreateNewsDTO, str]] = []
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if media_type in NDJSON_MEDIA_TYPES:
+        async for line in _ndjson_lines(request):
+            if not line.strip():
+                continue
+            if len(items) >= NEWS_BULK_MAX_ITEMS:
+                raise _too_many_items()
+            try:
+                items.append(CreateNewsDTO.model_validate_json(line))
+            except ValidationError as e:
+                items.append(_validation_message(e))
+        return items
+
+    try:
+        payload = orjson.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON",
+        )
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array of articles",
+        )
+    if len(payload) > NEWS_BULK_MAX_ITEMS:
+        raise _too_many_items()
+    for entry in payload:
+        try:
+            items.append(CreateNewsDTO.model_validate(entry))
+        except ValidationError as e:
+            items.append(_validation_message(e))
+    return items
+
+
+@router.post(
+    "/bulk",
+    response_model=SuccessResponseDTO,
+    summary="Create news articles in bulk",
+)
+async def create_news_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Create many articles in one request.
+
+    The body is a JSON array of articles shaped like `POST /api/news/`, or
+    one article per line with `Content-Type: application/x-ndjson`. Category
+    and image ids are checked with one query each, and valid articles are
+    inserted in batches of NEWS_BULK_BATCH_SIZE, one transaction per batch
+    that also updates the feeds. Articles with an `external_id` already
+    created from the same `source` are updated in place. Invalid articles
+    do not stop the others; `results` holds the `id` and `status` (created
+    or updated) or an `error` for every article, in request order.
+    """
+    try:
+        items = await _read_bulk_items(request)
+        logger.info(f"Bulk creating {len(items)} news articles")
+
+        results: List[Optional[dict]] = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                results[index] = {"index": index, "error": item}
+            else:
+                valid.append((index, item))
+
+        category_ids, image_ids = await existing_references(
+            db, (item for _, item in valid)
+        )
+        accepted = []
+        for index, item in valid:
+            missing_ids = set(item.category_ids) - category_ids
+            if missing_ids:
+                error = f"Categories with IDs {missing_ids} not found"
+            elif item.image_id is not None and item.image_id not in image_ids:
+                error = f"Image with ID {item.image_id} not found"
+            else:
+                accepted.append((index, item))
+                continue
+            results[index] = {"index": index, "error": error}
+
+        timestamp = datetime.utcnow()
+        for start in range(0, len(accepted), NEWS_BULK_BATCH_SIZE):
+            batch = accepted[start : start + NEWS_BULK_BATCH_SIZE]
+            batch_items = [item for _, item in batch]
+            feed_tags = {NEWEST_TAG}
+            for item in batch_items:
+                feed_tags.update(category_tag(c) for c in item.category_ids)
+            created_ids = []
+            try:
+                stored, replaced_categories = await upsert_news_batch(
+                    db, batch_items, timestamp
+                )
+                feed_tags.update(category_tag(c) for c in replaced_categories)
+                # In the batch's transaction, so no committed article is ever
+                # missing from the feeds; each feed takes at most FEED_SIZE
+                # entries of a batch, however large.
+                await update_feeds(
+                    db,
+                    feed_articles(batch_items, stored),
+                    [news.id for news in stored if not news.created],
+                )
+                await bump_versions(db, *sorted(feed_tags))
+                created_ids = [news.id for news in stored if news.created]
+                worker_sync.mark_local(created_ids)
+                await db.commit()
+            except Exception as e:
+                logger.error(f"Error inserting bulk news batch: {str(e)}")
+                await db.rollback()
+                worker_sync.unmark_local(created_ids)
+                error = f"Failed to insert: {str(e)}"
+                for index, _ in batch:
+                    results[index] = {"index": index, "error": error}
+                continue
+
+            response_cache.invalidate(*feed_tags)
+            # Events are only encoded when this worker has streams to send
+            # them to.
+            subscribed = len(live_feed) > 0
+            events = []
+            for (index, item), news in zip(batch, stored):
+                title_index.add(news.id, item.title)
+                results[index] = {
+                    "index": index,
+                    "id": news.id,
+                    "status": "created" if news.created else "updated",
+                }
+                if news.created and subscribed:
+                    events.append(
+                        news_event(
+                            news.id,
+                            item.title,
+                            item.short_description,
+                            item.image_id,
+                            timestamp,
+                            item.category_ids,
+                        )
+                    )
+            live_feed.publish(events)
+
+        created = sum(1 for result in results if result.get("status") == "created")
+        updated = sum(1 for result in results if result.get("status") == "updated")
+        failed = len(items) - created - updated
+        logger.info(
+            f"Bulk ingested {len(items)} news articles: "
+            f"{created} created, {updated} updated, {failed} failed"
+        )
+
+        return Response(
+            content=success_json(
+                f"Created {created} and updated {updated} "
+                f"of {len(items)} news articles",
+                {
+                    "created": created,
+                    "updated": updated,
+                    "failed": failed,
+                    "results": results,
+                },
+            ),
+            media_type=JSON_MEDIA_TYPE,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk creating news articles: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create news articles: {str(e)}",
+        )
+
+
 @router.get(
     "/by-category/{category_id}/titles",
-    response_model=SuccessResponseDTO,
+    response_model=PaginatedResponseDTO,
     summary="Get news titles by category",
 )
 async def get_news_titles_by_category(
+    request: Request,
     category_id: int,
-    limit: int = Query(10, ge=1, le=50, description="Number of results to return"),
-    db: Session = Depends(get_db),
+    page: PaginationDTO = Depends(get_pagination),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         logger.info(f"Fetching news titles for category ID: {category_id}")
 
-        category = db.query(Category).filter(Category.id == category_id).first()
+        # Before the cache lookup, so a missing category is a 404 rather
+        # than a 304.
+        category = await db.get(Category, category_id)
         if not category:
             logger.warning(f"Category ID {category_id} not found")
             raise HTTPException(
@@ -114,30 +432,31 @@ async def get_news_titles_by_category(
                 detail=f"Category with ID {category_id} not found",
             )
 
-        news_items = (
-            db.query(News)
-            .join(News.categories)
-            .filter(Category.id == category_id)
-            .order_by(desc(News.timestamp))
-            .limit(limit)
-            .all()
+        cached, etag, key = await cached_response(
+            db, request, category_tag(category_id)
         )
-
-        titles = [
-            NewsTitleDTO(
-                id=item.id,
-                title=item.title,
-                short_description=item.short_description,
-                image_id=item.image_id,
+        if cached is not None:
+            return cached
+
+        result = await feed_page(db, category_id, page.limit, page.after)
+        if result is None:
+            result = await paginate(
+                db,
+                in_category(news_titles_query(), category_id),
+                page.limit,
+                page.after,
+                CATEGORY_ORDER,
             )
-            for item in news_items
-        ]
+        news_items, next_cursor = result
+
+        titles = news_titles_data(news_items)
 
         logger.info(f"Found {len(titles)} news titles for category ID: {category_id}")
 
-        return SuccessResponseDTO(
-            message=f"Found {len(titles)} news titles", data=titles
-        )
+        body = paginated_json(f"Found {len(titles)} news titles", titles, next_cursor)
+        response_cache.set(key, body, tags=[category_tag(category_id)])
+
+        return await json_response(request, body, etag_headers(etag), key)
 
     except HTTPException:
         raise
@@ -155,13 +474,19 @@ async def get_news_titles_by_category(
     summary="Get news titles by multiple categories",
 )
 async def get_news_titles_by_multiple_categories(
-    request: MultipleCategoriesRequestDTO, db: Session = Depends(get_db)
+    request: MultipleCategoriesRequestDTO, db: AsyncSession = Depends(get_db)
 ):
     try:
         logger.info(f"Fetching news for category IDs: {request.category_ids}")
 
         categories = (
-            db.query(Category).filter(Category.id.in_(request.category_ids)).all()
+            (
+                await db.execute(
+                    select(Category).where(Category.id.in_(request.category_ids))
+                )
+            )
+            .scalars()
+            .all()
         )
         if len(categories) != len(request.category_ids):
             found_ids = {c.id for c in categories}
@@ -172,41 +497,27 @@ async def get_news_titles_by_multiple_categories(
                 detail=f"Categories with IDs {missing_ids} not found",
             )
 
-        all_news = []
-
-        for category in categories:
-            news_items = (
-                db.query(News)
-                .join(News.categories)
-                .filter(Category.id == category.id)
-                .order_by(desc(News.timestamp))
-                .limit(request.limit_per_category)
-                .all()
-            )
-
-            for item in news_items:
-                categories_info = [
-                    CategoryInfoDTO.model_validate(c) for c in item.categories
-                ]
-                all_news.append(
-                    NewsListItemDTO(
-                        id=item.id,
-                        title=item.title,
-                        short_description=item.short_description,
-                        categories=categories_info,
-                        timestamp=item.timestamp,
-                        source=item.source,
+        news_items = (
+            (
+                await db.execute(
+                    top_news_per_category_query(
+                        request.category_ids, request.limit_per_category
                     )
                 )
+            )
+            .scalars()
+            .all()
+        )
 
-        all_news.sort(key=lambda x: x.timestamp, reverse=True)
+        all_news = news_list_items_data(news_items)
 
         logger.info(
             f"Found {len(all_news)} news items across {len(categories)} categories"
         )
 
-        return SuccessResponseDTO(
-            message=f"Found {len(all_news)} news items", data=all_news
+        return Response(
+            content=success_json(f"Found {len(all_news)} news items", all_news),
+            media_type=JSON_MEDIA_TYPE,
         )
 
     except HTTPException:
@@ -221,33 +532,36 @@ async def get_news_titles_by_multiple_categories(
 
 @router.get(
     "/newest/titles",
-    response_model=SuccessResponseDTO,
+    response_model=PaginatedResponseDTO,
     summary="Get newest news titles",
 )
 async def get_newest_news_titles(
-    limit: int = Query(10, ge=1, le=50, description="Number of results to return"),
-    db: Session = Depends(get_db),
+    request: Request,
+    page: PaginationDTO = Depends(get_pagination),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        logger.info(f"Fetching {limit} newest news titles")
+        logger.info(f"Fetching {page.limit} newest news titles")
 
-        news_items = db.query(News).order_by(desc(News.timestamp)).limit(limit).all()
+        cached, etag, key = await cached_response(db, request, NEWEST_TAG)
+        if cached is not None:
+            return cached
 
-        titles = [
-            NewsTitleDTO(
-                id=item.id,
-                title=item.title,
-                short_description=item.short_description,
-                image_id=item.image_id,
-            )
-            for item in news_items
-        ]
+        result = await feed_page(db, NEWEST_FEED, page.limit, page.after)
+        if result is None:
+            result = await paginate(db, news_titles_query(), page.limit, page.after)
+        news_items, next_cursor = result
+
+        titles = news_titles_data(news_items)
 
         logger.info(f"Found {len(titles)} newest news titles")
 
-        return SuccessResponseDTO(
-            message=f"Found {len(titles)} newest news titles", data=titles
+        body = paginated_json(
+            f"Found {len(titles)} newest news titles", titles, next_cursor
         )
+        response_cache.set(key, body, tags=[NEWEST_TAG])
+
+        return await json_response(request, body, etag_headers(etag), key)
 
     except Exception as e:
         logger.error(f"Error fetching newest news titles: {str(e)}")
@@ -259,39 +573,46 @@ async def get_newest_news_titles(
 
 @router.get(
     "/search",
-    response_model=SuccessResponseDTO,
-    summary="Search news articles by title (fuzzy search)",
+    response_model=PaginatedResponseDTO,
+    summary="Search news articles (ranked full-text or fuzzy title search)",
 )
 async def search_news(
+    request: Request,
     q: str = Query(..., min_length=1, description="Search query string"),
-    limit: int = Query(10, ge=1, le=50, description="Number of results to return"),
-    db: Session = Depends(get_db),
+    mode: Literal["fulltext", "fuzzy"] = Query(
+        "fulltext",
+        description="fulltext: ranked prefix search over all text; "
+        "fuzzy: typo-tolerant title search",
+    ),
+    page: PaginationDTO = Depends(get_search_pagination),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        logger.info(f"Searching news with query: {q}")
+        logger.info(f"Searching news with query: {q} (mode: {mode})")
 
-        news_items = (
-            db.query(News)
-            .filter(News.title.ilike(f"%{q}%"))
-            .order_by(desc(News.timestamp))
-            .limit(limit)
-            .all()
-        )
+        etag = await compute_etag(db, request, NEWEST_TAG)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
 
-        titles = [
-            NewsTitleDTO(
-                id=item.id,
-                title=item.title,
-                short_description=item.short_description,
-                image_id=item.image_id,
+        if mode == "fuzzy":
+            rows, next_cursor = await fuzzy_search_news(db, q, page.limit, page.after)
+        else:
+            rows, next_cursor = await search_index.search_news(
+                db, q, page.limit, page.after
             )
-            for item in news_items
-        ]
 
-        logger.info(f"Found {len(titles)} news items matching query: {q}")
+        results = search_results_data(rows)
 
-        return SuccessResponseDTO(
-            message=f"Found {len(titles)} news items matching '{q}'", data=titles
+        logger.info(f"Found {len(results)} news items matching query: {q}")
+
+        return Response(
+            content=paginated_json(
+                f"Found {len(results)} news items matching '{q}'",
+                results,
+                next_cursor,
+            ),
+            media_type=JSON_MEDIA_TYPE,
+            headers=etag_headers(etag),
         )
 
     except HTTPException:
@@ -304,16 +625,181 @@ async def search_news(
         )
 
 
+async def _replay_events(
+    last_event_id: int, category_ids: Optional[List[int]]
+) -> List[NewsEvent]:
+    # Streams are long-lived, so they borrow a pooled connection only for
+    # this one query instead of holding a get_db session open.
+    async with SessionLocal() as db:
+        news_items = (
+            (
+                await db.execute(
+                    news_created_after_query(
+                        last_event_id, category_ids, LIVE_FEED_REPLAY_LIMIT
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+    return [
+        news_event(
+            item.id,
+            item.title,
+            item.short_description,
+            item.image_id,
+            item.timestamp,
+            [c.id for c in item.categories],
+        )
+        for item in reversed(news_items)
+    ]
+
+
+async def _live_events(
+    subscription: Subscription,
+    last_event_id: Optional[int],
+    category_ids: Optional[List[int]],
+) -> AsyncIterator[Optional[NewsEvent]]:
+    """
+    Articles missed since `last_event_id`, then live ones as they are
+    published, with None whenever a heartbeat is due. Ends when the
+    subscriber is dropped for falling behind.
+    """
+    last_id = 0
+    if last_event_id is not None:
+        # Subscribed before replaying, so nothing falls in between; live
+        # events the replay already covered are skipped.
+        for event in await _replay_events(last_event_id, category_ids):
+            last_id = event.id
+            yield event
+    while True:
+        try:
+            event = await subscription.next_event(LIVE_FEED_HEARTBEAT_SECONDS)
+        except ConnectionAbortedError as e:
+            logger.warning(f"Closing live feed stream: {str(e)}")
+            return
+        if event is None or event.id > last_id:
+            yield event
+
+
+async def _sse_stream(
+    last_event_id: Optional[int],
+    category_ids: Optional[List[int]],
+) -> AsyncIterator[bytes]:
+    # Subscribed on the first iteration, inside the try that unsubscribes:
+    # a client that disconnects before the body starts never subscribes.
+    yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+    try:
+        subscription = live_feed.subscribe(category_ids)
+    except LiveFeedFullError as e:
+        # Filled up since stream_news checked; the client retries.
+        logger.warning(f"Closing live feed stream: {str(e)}")
+        return
+    logger.info(f"Live feed subscriber connected ({len(live_feed)} connected)")
+    try:
+        async for event in _live_events(subscription, last_event_id, category_ids):
+            yield SSE_HEARTBEAT if event is None else event.sse
+    finally:
+        live_feed.unsubscribe(subscription)
+
+
+@router.get(
+    "/stream",
+    summary="Live feed of newly created articles (Server-Sent Events)",
+)
+async def stream_news(
+    request: Request,
+    category_id: Optional[List[int]] = Query(
+        None, description="Only articles in these categories (repeatable)"
+    ),
+    last_event_id: Optional[int] = Query(
+        None, description="Replay articles created after this id"
+    ),
+):
+    """
+    Stream articles as they are created, as `news` events whose id is the
+    article id. Reconnecting clients send the standard Last-Event-ID header
+    (or `last_event_id`) and first receive up to LIVE_FEED_REPLAY_LIMIT of
+    the newest articles they missed. A comment line is sent every
+    LIVE_FEED_HEARTBEAT_SECONDS to keep idle connections open.
+    """
+    header = request.headers.get("last-event-id")
+    if header:
+        try:
+            last_event_id = int(header)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid Last-Event-ID",
+            )
+
+    if live_feed.is_full:
+        logger.warning(f"Rejecting live feed subscriber: {len(live_feed)} connected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live feed is at capacity, please retry shortly",
+            headers={"Retry-After": str(SSE_RETRY_MS // 1000)},
+        )
+    return StreamingResponse(
+        _sse_stream(last_event_id, category_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.websocket("/stream/ws")
+async def stream_news_ws(
+    websocket: WebSocket,
+    category_id: Optional[List[int]] = Query(None),
+    last_event_id: Optional[int] = Query(None),
+):
+    """
+    The live feed over a WebSocket: `{"type": "news", "article": {...}}`
+    messages, and `{"type": "heartbeat"}` while idle.
+    """
+    try:
+        subscription = live_feed.subscribe(category_id)
+    except LiveFeedFullError as e:
+        logger.warning(f"Rejecting live feed subscriber: {str(e)}")
+        await websocket.close(code=1013)
+        return
+
+    try:
+        await websocket.accept()
+        async for event in _live_events(subscription, last_event_id, category_id):
+            await websocket.send_text(WS_HEARTBEAT if event is None else event.message)
+        # Dropped for falling behind: "try again later".
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_feed.unsubscribe(subscription)
+
+
 @router.get(
     "/{news_id}",
     response_model=SuccessResponseDTO,
     summary="Get full news article by ID",
 )
-async def get_news_by_id(news_id: int, db: Session = Depends(get_db)):
+async def get_news_by_id(
+    request: Request,
+    news_id: int,
+    db: AsyncSession = Depends(get_db),
+):
     try:
         logger.info(f"Fetching news article with ID: {news_id}")
 
-        news_item = db.query(News).filter(News.id == news_id).first()
+        etag = await compute_etag(db, request, NEWEST_TAG)
+        # Checked before answering 304, so a missing article is a 404 even
+        # to `If-None-Match: *`; the id alone is enough to tell.
+        if is_not_modified(request, etag) and await db.scalar(
+            select(News.id).where(News.id == news_id)
+        ):
+            return not_modified_response(etag)
+
+        news_item = (
+            await db.execute(news_details_query().where(News.id == news_id))
+        ).scalar_one_or_none()
 
         if not news_item:
             logger.warning(f"News article with ID {news_id} not found")
@@ -322,30 +808,14 @@ async def get_news_by_id(news_id: int, db: Session = Depends(get_db)):
                 detail=f"News article with ID {news_id} not found",
             )
 
-        categories_info = [
-            CategoryInfoDTO.model_validate(c) for c in news_item.categories
-        ]
-
-        image_location = None
-        if news_item.image:
-            image_location = news_item.image.location
-
-        news_detail = NewsDetailDTO(
-            id=news_item.id,
-            title=news_item.title,
-            description=news_item.description,
-            categories=categories_info,
-            timestamp=news_item.timestamp,
-            source=news_item.source,
-            created_at=news_item.created_at,
-            image_id=news_item.image_id,
-            image_location=image_location,
-        )
+        news_detail = news_detail_data(news_item)
 
         logger.info(f"Successfully fetched news article: {news_item.title}")
 
-        return SuccessResponseDTO(
-            message="News article retrieved successfully", data=news_detail
+        return Response(
+            content=success_json("News article retrieved successfully", news_detail),
+            media_type=JSON_MEDIA_TYPE,
+            headers=etag_headers(etag),
         )
 
     except HTTPException:
@@ -360,45 +830,35 @@ async def get_news_by_id(news_id: int, db: Session = Depends(get_db)):
 
 @router.get(
     "/newest/full",
-    response_model=SuccessResponseDTO,
+    response_model=PaginatedResponseDTO,
     summary="Get newest full news articles",
 )
 async def get_newest_full_news(
-    limit: int = Query(10, ge=1, le=50, description="Number of results to return"),
-    db: Session = Depends(get_db),
+    request: Request,
+    page: PaginationDTO = Depends(get_pagination),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        logger.info(f"Fetching {limit} newest full news articles")
-
-        news_items = db.query(News).order_by(desc(News.timestamp)).limit(limit).all()
-
-        news_list = []
-        for item in news_items:
-            categories_info = [
-                CategoryInfoDTO.model_validate(c) for c in item.categories
-            ]
-            image_location = None
-            if item.image:
-                image_location = item.image.location
-            news_list.append(
-                NewsDetailDTO(
-                    id=item.id,
-                    title=item.title,
-                    description=item.description,
-                    categories=categories_info,
-                    timestamp=item.timestamp,
-                    source=item.source,
-                    created_at=item.created_at,
-                    image_id=item.image_id,
-                    image_location=image_location,
-                )
-            )
+        logger.info(f"Fetching {page.limit} newest full news articles")
+
+        cached, etag, key = await cached_response(db, request, NEWEST_TAG)
+        if cached is not None:
+            return cached
+
+        news_items, next_cursor = await paginate(
+            db, news_details_query(), page.limit, page.after
+        )
+
+        news_list = [news_detail_data(item) for item in news_items]
 
         logger.info(f"Found {len(news_list)} newest full news articles")
 
-        return SuccessResponseDTO(
-            message=f"Found {len(news_list)} newest news articles", data=news_list
+        body = paginated_json(
+            f"Found {len(news_list)} newest news articles", news_list, next_cursor
         )
+        response_cache.set(key, body, tags=[NEWEST_TAG])
+
+        return await json_response(request, body, etag_headers(etag), key)
 
     except Exception as e:
         logger.error(f"Error fetching newest full news articles: {str(e)}")
@@ -410,18 +870,21 @@ async def get_newest_full_news(
 
 @router.get(
     "/by-category/{category_id}/full",
-    response_model=SuccessResponseDTO,
+    response_model=PaginatedResponseDTO,
     summary="Get full news articles by category",
 )
 async def get_full_news_by_category(
+    request: Request,
     category_id: int,
-    limit: int = Query(10, ge=1, le=50, description="Number of results to return"),
-    db: Session = Depends(get_db),
+    page: PaginationDTO = Depends(get_pagination),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         logger.info(f"Fetching full news articles for category ID: {category_id}")
 
-        category = db.query(Category).filter(Category.id == category_id).first()
+        # Before the cache lookup, so a missing category is a 404 rather
+        # than a 304.
+        category = await db.get(Category, category_id)
         if not category:
             logger.warning(f"Category ID {category_id} not found")
             raise HTTPException(
@@ -429,44 +892,32 @@ async def get_full_news_by_category(
                 detail=f"Category with ID {category_id} not found",
             )
 
-        news_items = (
-            db.query(News)
-            .join(News.categories)
-            .filter(Category.id == category_id)
-            .order_by(desc(News.timestamp))
-            .limit(limit)
-            .all()
+        cached, etag, key = await cached_response(
+            db, request, category_tag(category_id)
+        )
+        if cached is not None:
+            return cached
+
+        news_items, next_cursor = await paginate(
+            db,
+            in_category(news_details_query(), category_id),
+            page.limit,
+            page.after,
+            CATEGORY_ORDER,
         )
 
-        news_list = []
-        for item in news_items:
-            categories_info = [
-                CategoryInfoDTO.model_validate(c) for c in item.categories
-            ]
-            image_location = None
-            if item.image:
-                image_location = item.image.location
-            news_list.append(
-                NewsDetailDTO(
-                    id=item.id,
-                    title=item.title,
-                    description=item.description,
-                    categories=categories_info,
-                    timestamp=item.timestamp,
-                    source=item.source,
-                    created_at=item.created_at,
-                    image_id=item.image_id,
-                    image_location=image_location,
-                )
-            )
+        news_list = [news_detail_data(item) for item in news_items]
 
         logger.info(
             f"Found {len(news_list)} full news articles for category ID: {category_id}"
         )
 
-        return SuccessResponseDTO(
-            message=f"Found {len(news_list)} news articles", data=news_list
+        body = paginated_json(
+            f"Found {len(news_list)} news articles", news_list, next_cursor
         )
+        response_cache.set(key, body, tags=[category_tag(category_id)])
+
+        return await json_response(request, body, etag_headers(etag), key)
 
     except HTTPException:
         raise
@@ -0,0 +1,101 @@
+"""
+Articles per second through POST /api/news/bulk, run from the
+news_backend directory:
+
+    python -m benchmarks.bulk_ingest [--articles 20000] [--requests 3] [--sync]
+
+Starts the app on a throwaway SQLite database and sends wire-feed style
+requests of new articles (short bodies, an external id each, one or two
+of five categories), then the same requests again, which update every
+article in place. --sync runs the worker sync loop as a multi-worker
+deployment does.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="bulk-ingest-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/bench.db"
+os.environ["IMAGE_STORAGE_LOCATION"] = os.path.join(_workdir, "images")
+
+import httpx  # noqa: E402
+import orjson  # noqa: E402
+
+CATEGORIES = 5
+
+
+def articles(request: int, count: int):
+    return [
+        {
+            "title": f"Wire story {request}-{i} on markets and policy",
+            "description": "x" * 50,
+            "short_description": f"Summary of story {request}-{i}",
+            "category_ids": [1 + i % CATEGORIES, 1 + (i // 7) % CATEGORIES],
+            "source": "wire",
+            "external_id": f"{request}-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+async def send(client: httpx.AsyncClient, bodies, status: str) -> float:
+    start = time.perf_counter()
+    for body in bodies:
+        response = await client.post(
+            "/api/news/bulk",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        failed = response.json()["data"]["failed"]
+        assert failed == 0 and response.json()["data"][status], response.text
+    return time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    from database.database import SessionLocal
+    from database.models import Category
+    from main import app
+
+    bodies = [
+        orjson.dumps(articles(request, args.articles))
+        for request in range(args.requests)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            async with SessionLocal() as db:
+                db.add_all([Category(name=f"c{i}") for i in range(CATEGORIES)])
+                await db.commit()
+
+            total = args.articles * args.requests
+            print(f"{args.requests} requests of {args.articles} articles")
+            for name in ("created", "updated"):
+                seconds = await send(client, bodies, name)
+                print(
+                    f"  {name:8} {total / seconds:9.0f} articles/s  "
+                    f"({seconds * 1e3 / args.requests:.0f} ms/request)"
+                )
+
+    shutil.rmtree(_workdir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--sync", action="store_true")
+    args = parser.parse_args()
+    if args.sync:
+        os.environ["WORKER_SYNC_INTERVAL_SECONDS"] = "1"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
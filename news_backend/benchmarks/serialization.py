@@ -0,0 +1,119 @@
+"""
+CPU cost of serializing one page of 50 full articles, run from the
+news_backend directory:
+
+    python -m benchmarks.serialization [--items 50] [--body-bytes 4000]
+
+Compares the per-item DTO path (what FastAPI does for a response_model
+endpoint, and the DTO dump the response cache used before) with the
+row-to-bytes path in services.serialization.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from dto.news_dto import CategoryInfoDTO, NewsDetailDTO
+from dto.response_dto import PaginatedResponseDTO
+from services.serialization import news_detail_data, paginated_json
+
+
+def make_articles(count: int, body_bytes: int):
+    categories = [
+        SimpleNamespace(id=1, name="politics"),
+        SimpleNamespace(id=5, name="business"),
+    ]
+    image = SimpleNamespace(id=7, location="/api/images/abcdef.jpg")
+    now = datetime.now()
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f"Article {i}: markets react to the latest announcement",
+            description="x" * body_bytes,
+            categories=categories,
+            timestamp=now,
+            source="Wire Service",
+            created_at=now,
+            image_id=image.id,
+            image=image,
+        )
+        for i in range(count)
+    ]
+
+
+def dto_page(articles) -> PaginatedResponseDTO:
+    return PaginatedResponseDTO(
+        message=f"Found {len(articles)} newest news articles",
+        data=[
+            NewsDetailDTO(
+                id=item.id,
+                title=item.title,
+                description=item.description,
+                categories=[CategoryInfoDTO.model_validate(c) for c in item.categories],
+                timestamp=item.timestamp,
+                source=item.source,
+                created_at=item.created_at,
+                image_id=item.image_id,
+                image_location=item.image.location if item.image else None,
+            )
+            for item in articles
+        ],
+        next_cursor="cursor",
+    )
+
+
+def response_model_path(articles) -> bytes:
+    # FastAPI validates the returned model against response_model, turns it
+    # into plain data with jsonable_encoder and renders it with json.dumps.
+    page = PaginatedResponseDTO.model_validate(
+        dto_page(articles).model_dump(by_alias=True)
+    )
+    content = jsonable_encoder(page)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dto_dump_path(articles) -> bytes:
+    return dto_page(articles).model_dump_json(by_alias=True).encode()
+
+
+def fast_path(articles) -> bytes:
+    data = [news_detail_data(item) for item in articles]
+    return paginated_json(f"Found {len(data)} newest news articles", data, "cursor")
+
+
+def measure(render, articles, rounds: int) -> float:
+    render(articles)
+    start = time.process_time()
+    for _ in range(rounds):
+        render(articles)
+    return (time.process_time() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--body-bytes", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    articles = make_articles(args.items, args.body_bytes)
+    baseline = None
+    for name, render in (
+        ("response_model + json.dumps", response_model_path),
+        ("DTOs + model_dump_json", dto_dump_path),
+        ("rows + orjson", fast_path),
+    ):
+        seconds = measure(render, articles, args.rounds)
+        baseline = baseline or seconds
+        print(
+            f"{name:30} {seconds * 1e6:9.0f} us/request  "
+            f"{baseline / seconds:5.1f}x  {len(render(articles))} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Mixed read/write throughput on SQLite with and without the connection
+tuning in database/database.py, run from the news_backend directory:
+
+    python -m benchmarks.sqlite_concurrency [--writes 300] [--reads 1200] [--concurrency 64]
+
+Starts the app on a throwaway database and sends POST /api/news/ calls
+mixed with GET /api/news/newest/full reads, --concurrency of them in
+flight at once. "before" is an engine as created before the tuning: no
+pragmas (rollback journal, synchronous=FULL) and aiosqlite's NullPool;
+"after" is the engine as configured. Each profile runs in its own
+process, since the engine is created at import.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ("before", "after")
+CATEGORIES = 5
+
+
+def untuned_engine() -> None:
+    """Swap the configured engine for one without pragmas or a pool."""
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from database import database
+
+    event.remove(database.engine.sync_engine, "connect", database._apply_sqlite_pragmas)
+    database.engine = create_async_engine(
+        database.SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    )
+    database.SessionLocal.configure(bind=database.engine)
+
+
+async def timed(client, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code < 400
+    except Exception:
+        ok = False
+    return method, ok, time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    import httpx
+
+    if args.profile == "before":
+        untuned_engine()
+
+    from database.database import SessionLocal
+    from database.models import Category
+    from main import app
+
+    requests = [("GET", "/api/news/newest/full", {})] * args.reads + [
+        (
+            "POST",
+            "/api/news/",
+            {
+                "json": {
+                    "title": f"Concurrent story {i}",
+                    "description": "x" * 500,
+                    "category_ids": [1 + i % CATEGORIES],
+                    "source": "bench",
+                }
+            },
+        )
+        for i in range(args.writes)
+    ]
+    random.Random(0).shuffle(requests)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def send(client, method, url, kwargs):
+        async with limit:
+            return await timed(client, method, url, **kwargs)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with SessionLocal() as db:
+            db.add_all([Category(name=f"c{i}") for i in range(CATEGORIES)])
+            await db.commit()
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(send(client, *request) for request in requests)
+            )
+            seconds = time.perf_counter() - start
+
+    print(f"  {args.profile:6} {len(results) / seconds:7.0f} req/s", end="")
+    for method in ("GET", "POST"):
+        latencies = sorted(s for m, ok, s in results if m == method and ok)
+        failed = sum(1 for m, ok, _ in results if m == method and not ok)
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+        median = statistics.median(latencies) if latencies else 0.0
+        print(
+            f"  {method:4} p50 {median * 1e3:6.0f} ms  p95 {p95 * 1e3:6.0f} ms  "
+            f"{failed:4} failed",
+            end="",
+        )
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--writes", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=1200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--profile", choices=PROFILES)
+    args = parser.parse_args()
+
+    if args.profile is None:
+        print(
+            f"{args.writes} writes and {args.reads} reads, "
+            f"{args.concurrency} in flight"
+        )
+        for profile in PROFILES:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.sqlite_concurrency"]
+                + sys.argv[1:]
+                + ["--profile", profile],
+                check=True,
+            )
+        return
+
+    workdir = tempfile.mkdtemp(prefix="sqlite-concurrency-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir}/bench.db"
+    os.environ["IMAGE_STORAGE_LOCATION"] = os.path.join(workdir, "images")
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
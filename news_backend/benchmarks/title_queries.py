@@ -0,0 +1,150 @@
+"""
+Time and memory of one page of titles read from the news table, run from
+the news_backend directory:
+
+    python -m benchmarks.title_queries [--articles 2000] [--body-bytes 50000]
+
+Builds a throwaway SQLite database of articles with large bodies and
+pages through the newest and by-category title lists the way the title
+endpoints do once a page runs past the precomputed feeds, loading full
+News entities, load_only entities and plain column rows.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_workdir = tempfile.mkdtemp(prefix="title-queries-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/bench.db"
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import load_only  # noqa: E402
+
+from database.database import SessionLocal, create_tables, engine  # noqa: E402
+from database.models import Category, News, news_categories  # noqa: E402
+from database.pagination import NEWEST_ORDER, decode_cursor, paginate  # noqa: E402
+from database.queries import (  # noqa: E402
+    CATEGORY_ORDER,
+    in_category,
+    news_titles_query,
+)
+
+CATEGORIES = 5
+PAGE_SIZE = 50
+
+
+def full_entities_query():
+    return select(News)
+
+
+def load_only_query():
+    return select(News).options(
+        load_only(
+            News.id,
+            News.title,
+            News.short_description,
+            News.image_id,
+            News.timestamp,
+        )
+    )
+
+
+async def seed(articles: int, body_bytes: int) -> None:
+    await create_tables()
+    now = datetime.now()
+    async with SessionLocal() as db:
+        db.add_all([Category(name=f"category {i}") for i in range(CATEGORIES)])
+        await db.flush()
+        for start in range(0, articles, 500):
+            ids = range(start, min(start + 500, articles))
+            await db.execute(
+                insert(News),
+                [
+                    {
+                        "id": i + 1,
+                        "title": f"Article {i}",
+                        "short_description": f"Summary of article {i}",
+                        "description": "x" * body_bytes,
+                        "source": "bench",
+                        "timestamp": now - timedelta(minutes=i),
+                    }
+                    for i in ids
+                ],
+            )
+            await db.execute(
+                insert(news_categories),
+                [
+                    {
+                        "news_id": i + 1,
+                        "category_id": 1 + i % CATEGORIES,
+                        "timestamp": now - timedelta(minutes=i),
+                    }
+                    for i in ids
+                ],
+            )
+        await db.commit()
+
+
+async def walk(make_query, order, pages: int) -> None:
+    after = None
+    async with SessionLocal() as db:
+        for _ in range(pages):
+            _, cursor = await paginate(db, make_query(), PAGE_SIZE, after, order)
+            if cursor is None:
+                break
+            after = decode_cursor(cursor)
+
+
+async def measure(make_query, order, pages: int):
+    await walk(make_query, order, 1)
+
+    start = time.perf_counter()
+    await walk(make_query, order, pages)
+    seconds = (time.perf_counter() - start) / pages
+
+    tracemalloc.start()
+    await walk(make_query, order, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+async def run(args: argparse.Namespace) -> None:
+    await seed(args.articles, args.body_bytes)
+    pages = args.articles // CATEGORIES // PAGE_SIZE
+
+    for listing, scope, order in (
+        ("newest", lambda query: query, NEWEST_ORDER),
+        ("by-category", lambda query: in_category(query, 1), CATEGORY_ORDER),
+    ):
+        print(f"{listing} titles, {pages} pages of {PAGE_SIZE}")
+        for name, query in (
+            ("News entities", full_entities_query),
+            ("load_only entities", load_only_query),
+            ("column rows", news_titles_query),
+        ):
+            seconds, peak = await measure(lambda: scope(query()), order, pages)
+            print(
+                f"  {name:20} {seconds * 1e3:7.2f} ms/page  "
+                f"{peak / 1024:9.0f} KiB peak"
+            )
+
+    await engine.dispose()
+    shutil.rmtree(_workdir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--body-bytes", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Memory and query latency of the fuzzy title index, run from the
+news_backend directory:
+
+    python -m benchmarks.trigram_index [--titles 100000] [--queries 500]
+
+Indexes synthetic headlines (words drawn with a Zipf-like skew, so some
+trigrams are very common) and times searches for misspelled fragments of
+indexed titles.
+"""
+
+import argparse
+import gc
+import itertools
+import random
+import statistics
+import string
+import time
+import tracemalloc
+
+from services.trigram_index import TrigramIndex
+
+VOCABULARY = 20000
+WORDS_PER_TITLE = (5, 12)
+
+
+def make_vocabulary(rng: random.Random):
+    return [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(VOCABULARY)
+    ]
+
+
+def make_title(rng: random.Random, words, weights) -> str:
+    count = rng.randint(*WORDS_PER_TITLE)
+    return " ".join(rng.choices(words, cum_weights=weights, k=count)).capitalize()
+
+
+def misspell(rng: random.Random, title: str) -> str:
+    words = title.split()
+    start = rng.randrange(len(words))
+    fragment = list(" ".join(words[start : start + 3]))
+    position = rng.randrange(len(fragment))
+    fragment[position] = rng.choice(string.ascii_lowercase)
+    return "".join(fragment)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words = make_vocabulary(rng)
+    # Zipf's law: the n-th most common word is used 1/n as often as the
+    # most common one.
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, VOCABULARY + 1)))
+    titles = [make_title(rng, words, weights) for _ in range(args.titles)]
+
+    gc.collect()
+    tracemalloc.start()
+    index = TrigramIndex()
+    start = time.perf_counter()
+    for news_id, title in enumerate(titles, 1):
+        index.add(news_id, title)
+    build_seconds = time.perf_counter() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    queries = [misspell(rng, rng.choice(titles)) for _ in range(args.queries)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, 11)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    print(f"{args.titles} titles indexed in {build_seconds:.1f} s")
+    print(f"  index memory   {size / 2**20:8.1f} MiB")
+    print(f"  search median  {statistics.median(timings) * 1e3:8.2f} ms")
+    print(f"  search p95     {timings[int(len(timings) * 0.95)] * 1e3:8.2f} ms")
+    print(f"  search max     {timings[-1] * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+import heapq
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import FeedEntry, News, news_categories
+from database.pagination import encode_cursor
+
+# How many of the newest articles each feed keeps. Pages beyond that are
+# read from the news table instead.
+FEED_SIZE = int(os.getenv("FEED_SIZE", "1000"))
+
+# Feed id of the all-articles feed; category feeds use the category id.
+NEWEST_FEED = 0
+
+# Replaced ids are removed in chunks, within SQLite's limit on bound
+# parameters, since a bulk request can update tens of thousands.
+_IDS_PER_STATEMENT = 1000
+
+_COLUMNS = ["feed_id", "news_id", "timestamp", "title", "short_description", "image_id"]
+
+_TRIM_SQL = text(
+    "DELETE FROM feed_entries WHERE feed_id = :feed_id "
+    "AND (timestamp, news_id) <= ("
+    "SELECT timestamp, news_id FROM feed_entries WHERE feed_id = :feed_id "
+    "ORDER BY timestamp DESC, news_id DESC LIMIT 1 OFFSET :size)"
+)
+
+# A feed holds every article of the feed from its oldest entry onwards,
+# and a feed with fewer than FEED_SIZE entries holds all of its articles.
+# Category feeds that lost entries because articles left the category are
+# topped up with the newest of the category's articles they are missing,
+# which are all older than their oldest entry.
+_REFILL_SQL = text(
+    "INSERT INTO feed_entries "
+    "(feed_id, news_id, timestamp, title, short_description, image_id) "
+    "SELECT :feed_id, news.id, news.timestamp, news.title, "
+    "news.short_description, news.image_id "
+    "FROM news_categories JOIN news ON news.id = news_categories.news_id "
+    "WHERE news_categories.category_id = :feed_id AND NOT EXISTS ("
+    "SELECT 1 FROM feed_entries WHERE feed_id = :feed_id "
+    "AND timestamp = news_categories.timestamp "
+    "AND news_id = news_categories.news_id) "
+    "ORDER BY news_categories.timestamp DESC, news_categories.news_id DESC "
+    "LIMIT :missing"
+)
+
+
+def rebuild_feeds(conn: Connection) -> int:
+    """
+    Regenerate every feed from the news table. Returns the number of
+    entries written.
+    """
+    feed = FeedEntry.__table__
+    conn.execute(delete(feed))
+
+    newest = (
+        select(
+            literal(NEWEST_FEED),
+            News.id,
+            News.timestamp,
+            News.title,
+            News.short_description,
+            News.image_id,
+        )
+        .order_by(desc(News.timestamp), desc(News.id))
+        .limit(FEED_SIZE)
+    )
+    conn.execute(insert(feed).from_select(_COLUMNS, newest))
+
+    ranked = (
+        select(
+            news_categories.c.category_id,
+            News.id,
+            News.timestamp,
+            News.title,
+            News.short_description,
+            News.image_id,
+            func.row_number()
+            .over(
+                partition_by=news_categories.c.category_id,
+                order_by=(desc(News.timestamp), desc(News.id)),
+            )
+            .label("rank"),
+        )
+        .join(News, News.id == news_categories.c.news_id)
+        .subquery()
+    )
+    by_category = select(
+        ranked.c.category_id,
+        ranked.c.id,
+        ranked.c.timestamp,
+        ranked.c.title,
+        ranked.c.short_description,
+        ranked.c.image_id,
+    ).where(ranked.c.rank <= FEED_SIZE)
+    conn.execute(insert(feed).from_select(_COLUMNS, by_category))
+
+    return conn.execute(select(func.count()).select_from(feed)).scalar_one()
+
+
+class FeedArticle(NamedTuple):
+    id: int
+    timestamp: datetime
+    title: str
+    short_description: Optional[str]
+    image_id: Optional[int]
+    category_ids: List[int]
+
+
+async def _oldest_entries(
+    db: AsyncSession, feed_ids: List[int]
+) -> Dict[int, Tuple[datetime, int]]:
+    """The (timestamp, news_id) of the oldest entry of each full feed."""
+    # Counted first, then one index seek per full feed: cheaper than
+    # ranking every entry, which each batch of a bulk request would pay.
+    sizes = (
+        await db.execute(
+            select(FeedEntry.feed_id, func.count())
+            .where(FeedEntry.feed_id.in_(feed_ids))
+            .group_by(FeedEntry.feed_id)
+        )
+    ).all()
+    oldest = {}
+    for feed_id, size in sizes:
+        if size >= FEED_SIZE:
+            row = (
+                await db.execute(
+                    select(FeedEntry.timestamp, FeedEntry.news_id)
+                    .where(FeedEntry.feed_id == feed_id)
+                    .order_by(FeedEntry.timestamp, FeedEntry.news_id)
+                    .limit(1)
+                )
+            ).one()
+            oldest[feed_id] = (row.timestamp, row.news_id)
+    return oldest
+
+
+async def update_feeds(
+    db: AsyncSession, articles: Iterable[FeedArticle], replaced_ids: List[int]
+) -> None:
+    """
+    Put written articles into the all-articles feed and their category
+    feeds, in the caller's transaction. Entries of `replaced_ids`, articles
+    that were updated, are replaced. An updated article keeps its original
+    timestamp, so it only goes back into a full feed if it is no older
+    than the feed's oldest entry; anything below that may sit among
+    articles trimmed away. Feeds that grew past FEED_SIZE are trimmed back
+    to it, and category feeds that shrank are refilled.
+    """
+    # Only the newest FEED_SIZE entries of a feed can outlast the trim,
+    # whatever the feed held before, so a large batch writes just those.
+    # An article written more than once is entered as last written.
+    by_feed: Dict[int, List[FeedArticle]] = {}
+    for article in {article.id: article for article in articles}.values():
+        for feed_id in dict.fromkeys((NEWEST_FEED, *article.category_ids)):
+            by_feed.setdefault(feed_id, []).append(article)
+    entries: List[Dict] = []
+    for feed_id, feed_articles in by_feed.items():
+        if len(feed_articles) > FEED_SIZE:
+            feed_articles = heapq.nlargest(
+                FEED_SIZE,
+                feed_articles,
+                key=lambda article: (article.timestamp, article.id),
+            )
+        for article in feed_articles:
+            entries.append(
+                {
+                    "feed_id": feed_id,
+                    "news_id": article.id,
+                    "timestamp": article.timestamp,
+                    "title": article.title,
+                    "short_description": article.short_description,
+                    "image_id": article.image_id,
+                }
+            )
+    if not entries:
+        return
+
+    # Read before the replaced entries are removed: they may be the oldest
+    # entries of a feed, or all of them.
+    oldest = await _oldest_entries(db, sorted({entry["feed_id"] for entry in entries}))
+    removed: Counter = Counter()
+    for start in range(0, len(replaced_ids), _IDS_PER_STATEMENT):
+        removed.update(
+            (
+                await db.execute(
+                    delete(FeedEntry)
+                    .where(
+                        FeedEntry.news_id.in_(
+                            replaced_ids[start : start + _IDS_PER_STATEMENT]
+                        )
+                    )
+                    .returning(FeedEntry.feed_id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    entries = [
+        entry
+        for entry in entries
+        if entry["feed_id"] not in oldest
+        or (entry["timestamp"], entry["news_id"]) >= oldest[entry["feed_id"]]
+    ]
+    if entries:
+        await db.execute(insert(FeedEntry), entries)
+        removed.subtract(entry["feed_id"] for entry in entries)
+
+    feed_ids = sorted({entry["feed_id"] for entry in entries})
+    if feed_ids:
+        await db.execute(
+            _TRIM_SQL, [{"feed_id": feed_id, "size": FEED_SIZE} for feed_id in feed_ids]
+        )
+
+    # The all-articles feed gets back at least as many entries as it lost
+    # (every replaced article is in it), so only category feeds can come
+    # out smaller.
+    shrunk = [
+        feed_id
+        for feed_id, count in removed.items()
+        if count > 0 and feed_id != NEWEST_FEED
+    ]
+    if shrunk:
+        sizes = dict(
+            (
+                await db.execute(
+                    select(FeedEntry.feed_id, func.count())
+                    .where(FeedEntry.feed_id.in_(shrunk))
+                    .group_by(FeedEntry.feed_id)
+                )
+            ).all()
+        )
+        refills = [
+            {"feed_id": feed_id, "missing": FEED_SIZE - sizes.get(feed_id, 0)}
+            for feed_id in shrunk
+            if sizes.get(feed_id, 0) < FEED_SIZE
+        ]
+        if refills:
+            await db.execute(_REFILL_SQL, refills)
+
+
+async def feed_page(
+    db: AsyncSession,
+    feed_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    """
+    A page of titles read from a feed, newest first, as rows with the
+    attributes of a news title (id, title, short_description, image_id,
+    timestamp), and the next cursor. Cursors are interchangeable with
+    database.pagination.paginate.
+
+    A feed with fewer than FEED_SIZE entries holds every article of the
+    feed, so a page that runs past its oldest entry is the last page.
+    Returns None when the page runs past the oldest entry of a full feed,
+    where older articles may have been trimmed away; the caller reads that
+    page from the news table instead.
+    """
+    query = select(
+        FeedEntry.news_id.label("id"),
+        FeedEntry.title,
+        FeedEntry.short_description,
+        FeedEntry.image_id,
+        FeedEntry.timestamp,
+    ).where(FeedEntry.feed_id == feed_id)
+    if after is not None:
+        query = query.where(
+            tuple_(FeedEntry.timestamp, FeedEntry.news_id) < tuple_(*after)
+        )
+    query = query.order_by(desc(FeedEntry.timestamp), desc(FeedEntry.news_id)).limit(
+        limit + 1
+    )
+    rows = (await db.execute(query)).all()
+
+    if len(rows) <= limit:
+        full = (
+            await db.execute(
+                select(FeedEntry.news_id)
+                .where(FeedEntry.feed_id == feed_id)
+                .order_by(desc(FeedEntry.timestamp), desc(FeedEntry.news_id))
+                .offset(FEED_SIZE - 1)
+                .limit(1)
+            )
+        ).first() is not None
+        return None if full else (rows, None)
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].timestamp, rows[-1].id)
@@ -0,0 +1,199 @@
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.feeds import FeedArticle
+from database.models import Category, Image, News, news_categories
+from dto.news_dto import CreateNewsDTO
+
+# Upper bound on articles per bulk request, and how many are written per
+# transaction. Each batch is one multi-row upsert into news (and one insert
+# into news_categories), so a batch costs a handful of statements and a
+# single commit however many articles it holds.
+NEWS_BULK_MAX_ITEMS = int(os.getenv("NEWS_BULK_MAX_ITEMS", "50000"))
+NEWS_BULK_BATCH_SIZE = int(os.getenv("NEWS_BULK_BATCH_SIZE", "1000"))
+
+
+async def existing_references(
+    db: AsyncSession, items: Iterable[CreateNewsDTO]
+) -> Tuple[Set[int], Set[int]]:
+    """
+    The category and image ids referenced by `items` that exist, looked up
+    with one query per table however many articles there are.
+    """
+    category_ids: Set[int] = set()
+    image_ids: Set[int] = set()
+    for item in items:
+        category_ids.update(item.category_ids)
+        if item.image_id is not None:
+            image_ids.add(item.image_id)
+
+    found_categories: Set[int] = set()
+    if category_ids:
+        found_categories = set(
+            (await db.execute(select(Category.id).where(Category.id.in_(category_ids))))
+            .scalars()
+            .all()
+        )
+    found_images: Set[int] = set()
+    if image_ids:
+        found_images = set(
+            (await db.execute(select(Image.id).where(Image.id.in_(image_ids))))
+            .scalars()
+            .all()
+        )
+    return found_categories, found_images
+
+
+class StoredNews(NamedTuple):
+    id: int
+    timestamp: datetime
+    created_at: datetime
+    # False when the article already existed under its (source,
+    # external_id) and was updated in place.
+    created: bool
+
+
+# Columns a redelivered article overwrites. The feed position (timestamp)
+# and created_at of the original are kept.
+_UPSERT_COLUMNS = ("title", "description", "short_description", "image_id")
+
+
+def _upsert_statement(dialect_name: str):
+    news = News.__table__
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = insert(news)
+    return statement.on_conflict_do_update(
+        index_elements=[news.c.source, news.c.external_id],
+        set_={
+            **{column: statement.excluded[column] for column in _UPSERT_COLUMNS},
+            "updated_at": func.now(),
+        },
+    ).returning(
+        news.c.id,
+        news.c.source,
+        news.c.external_id,
+        news.c.timestamp,
+        news.c.created_at,
+        news.c.updated_at,
+    )
+
+
+async def upsert_news_batch(
+    db: AsyncSession, items: List[CreateNewsDTO], timestamp: datetime
+) -> Tuple[List[StoredNews], Set[int]]:
+    """
+    Insert already validated articles, or update the ones whose (source,
+    external_id) already exists, and replace their category links, with
+    one executemany per table and no read beforehand. The caller owns the
+    transaction, and puts the articles into the feeds (see feed_articles
+    and database.feeds.update_feeds), once per request however many
+    batches it writes.
+
+    Returns one StoredNews per item, in the order of `items`, and the
+    categories the updated articles were linked to before, whose feeds
+    changed too. Repeats of a key within `items` resolve to the last one.
+    """
+    by_key: Dict[Tuple[str, str], CreateNewsDTO] = {}
+    unkeyed: List[CreateNewsDTO] = []
+    for item in items:
+        if item.external_id is None:
+            unkeyed.append(item)
+        else:
+            by_key[(item.source, item.external_id)] = item
+
+    returned = (
+        await db.execute(
+            _upsert_statement(db.bind.dialect.name),
+            [
+                {
+                    "title": item.title,
+                    "description": item.description,
+                    "short_description": item.short_description,
+                    "source": item.source,
+                    "external_id": item.external_id,
+                    "image_id": item.image_id,
+                    "timestamp": timestamp,
+                }
+                for item in (*unkeyed, *by_key.values())
+            ],
+        )
+    ).all()
+
+    # RETURNING rows come back in no guaranteed order, and asking SQLAlchemy
+    # to sort them (sort_by_parameter_order) makes it fall back to one
+    # INSERT per row on SQLite. Keyed rows are matched by their key; the
+    # rest were all inserted, with ids allocated in VALUES order while this
+    # transaction holds the write lock, so sorting them restores the order.
+    stored_by_key: Dict[Tuple[str, str], StoredNews] = {}
+    stored_unkeyed: List[StoredNews] = []
+    for row in returned:
+        stored = StoredNews(
+            row.id, row.timestamp, row.created_at, row.updated_at is None
+        )
+        if row.external_id is None:
+            stored_unkeyed.append(stored)
+        else:
+            stored_by_key[(row.source, row.external_id)] = stored
+    stored_unkeyed.sort()
+
+    written = list(zip(stored_unkeyed, unkeyed))
+    written += [(stored_by_key[key], item) for key, item in by_key.items()]
+
+    replaced_categories: Set[int] = set()
+    updated_ids = [stored.id for stored, _ in written if not stored.created]
+    if updated_ids:
+        replaced_categories = set(
+            (
+                await db.execute(
+                    delete(news_categories)
+                    .where(news_categories.c.news_id.in_(updated_ids))
+                    .returning(news_categories.c.category_id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    links = [
+        {
+            "news_id": stored.id,
+            "category_id": category_id,
+            "timestamp": stored.timestamp,
+        }
+        for stored, item in written
+        for category_id in dict.fromkeys(item.category_ids)
+    ]
+    await db.execute(insert(news_categories), links)
+
+    unkeyed_results = iter(stored_unkeyed)
+    results = [
+        (
+            next(unkeyed_results)
+            if item.external_id is None
+            else stored_by_key[(item.source, item.external_id)]
+        )
+        for item in items
+    ]
+    return results, replaced_categories
+
+
+def feed_articles(
+    items: Iterable[CreateNewsDTO], stored: Iterable[StoredNews]
+) -> List[FeedArticle]:
+    """The feed entries of articles written by upsert_news_batch."""
+    return [
+        FeedArticle(
+            news.id,
+            news.timestamp,
+            item.title,
+            item.short_description,
+            item.image_id,
+            item.category_ids,
+        )
+        for item, news in zip(items, stored)
+    ]
@@ -0,0 +1,247 @@
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.feeds import rebuild_feeds
+from database.search import create_search_index
+from database.versions import create_version_triggers
+
+logger = logging.getLogger(__name__)
+
+# Schema changes that create_all cannot apply to an existing database.
+# Every step is idempotent on its own and is recorded in schema_migrations
+# once applied, so steps run exactly once per database. Append new steps
+# with the next version number; never edit or reorder applied ones.
+
+
+def _newest_covering_index(conn: Connection) -> None:
+    # Covers the "newest titles" projection so those pages are read from
+    # the index alone; the (timestamp, id) prefix also serves keyset paging
+    # for every other newest-first listing.
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_news_newest_covering "
+            "ON news (timestamp, id, title, short_description, image_id)"
+        )
+    )
+    conn.execute(text("DROP INDEX IF EXISTS ix_news_timestamp_id"))
+
+
+def _category_news_covering_index(conn: Connection) -> None:
+    # The primary key is (news_id, category_id), which cannot answer
+    # "articles in category X" without a full scan.
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_news_categories_category_news "
+            "ON news_categories (category_id, news_id)"
+        )
+    )
+
+
+def _news_search_index(conn: Connection) -> None:
+    create_search_index(conn)
+
+
+def _image_content_hash(conn: Connection) -> None:
+    # Images are stored under the hash of their bytes; the unique index
+    # makes a duplicate upload resolve to the existing row. Rows uploaded
+    # before this have no hash, and NULLs never conflict.
+    columns = {column["name"] for column in inspect(conn).get_columns("images")}
+    if "content_hash" not in columns:
+        conn.execute(text("ALTER TABLE images ADD COLUMN content_hash VARCHAR(64)"))
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_images_content_hash "
+            "ON images (content_hash)"
+        )
+    )
+
+
+def _news_external_id(conn: Connection) -> None:
+    # Wire feeds redeliver articles; the unique index is the conflict
+    # target that turns a redelivery into an update. Articles without an
+    # external id have NULL there, and NULLs never conflict.
+    columns = {column["name"] for column in inspect(conn).get_columns("news")}
+    if "external_id" not in columns:
+        conn.execute(text("ALTER TABLE news ADD COLUMN external_id VARCHAR(255)"))
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_news_source_external_id "
+            "ON news (source, external_id)"
+        )
+    )
+
+
+def _news_feeds(conn: Connection) -> None:
+    # create_all has made the empty feed_entries table; fill it from the
+    # articles that already exist.
+    rebuild_feeds(conn)
+
+
+def _news_updated_at_index(conn: Connection) -> None:
+    # Workers look up articles updated since their last sync.
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_news_updated_at ON news (updated_at)")
+    )
+
+
+def _category_news_timestamp_index(conn: Connection) -> None:
+    # (category_id, news_id) finds a category's articles but not in feed
+    # order, so category pages sorted the whole category in a temp b-tree
+    # unless ANALYZE statistics happened to favour scanning news instead.
+    # With the timestamp copied into the link table the index yields them
+    # newest first and a page reads only its own rows.
+    columns = {
+        column["name"] for column in inspect(conn).get_columns("news_categories")
+    }
+    if "timestamp" not in columns:
+        conn.execute(text("ALTER TABLE news_categories ADD COLUMN timestamp DATETIME"))
+    conn.execute(
+        text(
+            "UPDATE news_categories SET timestamp = ("
+            "SELECT timestamp FROM news WHERE news.id = news_categories.news_id)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_news_categories_category_timestamp "
+            "ON news_categories (category_id, timestamp, news_id)"
+        )
+    )
+    conn.execute(text("DROP INDEX IF EXISTS ix_news_categories_category_news"))
+
+
+def _news_search_update_trigger(conn: Connection) -> None:
+    # Redelivered articles are upserted with their text mostly unchanged;
+    # the trigger now skips re-indexing those.
+    conn.execute(text("DROP TRIGGER IF EXISTS news_fts_after_update"))
+    create_search_index(conn)
+
+
+def _categories_version_triggers(conn: Connection) -> None:
+    create_version_triggers(conn)
+
+
+_SQLITE_CATEGORY_TIMESTAMP_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS news_categories_timestamp_after_insert
+    AFTER INSERT ON news_categories WHEN new.timestamp IS NULL BEGIN
+        UPDATE news_categories
+        SET timestamp = (SELECT timestamp FROM news WHERE id = new.news_id)
+        WHERE news_id = new.news_id AND category_id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_timestamp_after_update
+    AFTER UPDATE OF timestamp ON news
+    WHEN old.timestamp IS NOT new.timestamp BEGIN
+        UPDATE news_categories SET timestamp = new.timestamp
+        WHERE news_id = new.id;
+    END
+    """,
+]
+
+_POSTGRES_CATEGORY_TIMESTAMP_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION news_categories_timestamp() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.timestamp IS NULL THEN
+            SELECT news.timestamp INTO NEW.timestamp
+            FROM news WHERE news.id = NEW.news_id;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS news_categories_timestamp ON news_categories",
+    """
+    CREATE TRIGGER news_categories_timestamp
+    BEFORE INSERT ON news_categories
+    FOR EACH ROW EXECUTE FUNCTION news_categories_timestamp()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION news_timestamp() RETURNS trigger AS $$
+    BEGIN
+        UPDATE news_categories SET timestamp = NEW.timestamp
+        WHERE news_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS news_timestamp ON news",
+    """
+    CREATE TRIGGER news_timestamp
+    AFTER UPDATE OF timestamp ON news
+    FOR EACH ROW WHEN (OLD.timestamp IS DISTINCT FROM NEW.timestamp)
+    EXECUTE FUNCTION news_timestamp()
+    """,
+]
+
+
+def _category_news_timestamp_triggers(conn: Connection) -> None:
+    # upsert_news_batch writes the timestamp copy itself; links added any
+    # other way (the ORM relationship, seed data, an admin's SQL) would
+    # leave it NULL, and keyset pages and feed refills skip NULL rows
+    # without an error. Triggers fill it in and follow timestamp changes.
+    if conn.dialect.name == "postgresql":
+        statements = _POSTGRES_CATEGORY_TIMESTAMP_TRIGGERS
+    else:
+        statements = _SQLITE_CATEGORY_TIMESTAMP_TRIGGERS
+    for statement in statements:
+        conn.execute(text(statement))
+    conn.execute(
+        text(
+            "UPDATE news_categories SET timestamp = ("
+            "SELECT timestamp FROM news WHERE news.id = news_categories.news_id) "
+            "WHERE timestamp IS NULL"
+        )
+    )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "newest covering index", _newest_covering_index),
+    (2, "category news covering index", _category_news_covering_index),
+    (3, "news full-text search index", _news_search_index),
+    (4, "image content hash", _image_content_hash),
+    (5, "news external id", _news_external_id),
+    (6, "news feeds", _news_feeds),
+    (7, "news updated_at index", _news_updated_at_index),
+    (8, "category news timestamp index", _category_news_timestamp_index),
+    (9, "news search update trigger", _news_search_update_trigger),
+    (10, "categories version triggers", _categories_version_triggers),
+    (11, "category news timestamp triggers", _category_news_timestamp_triggers),
+]
+
+
+async def run_migrations(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, "
+                "name VARCHAR(255) NOT NULL, "
+                "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        applied = set(
+            (await conn.execute(text("SELECT version FROM schema_migrations")))
+            .scalars()
+            .all()
+        )
+
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        async with engine.begin() as conn:
+            logger.info(f"Applying migration {version}: {name}")
+            await conn.run_sync(migrate)
+            await conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, name) "
+                    "VALUES (:version, :name)"
+                ),
+                {"version": version, "name": name},
+            )
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+    Table,
+    UniqueConstraint,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -17,6 +27,11 @@ news_categories = Table(
         ForeignKey("categories.id", ondelete="CASCADE"),
         primary_key=True,
     ),
+    # Copy of the article's timestamp, so the category index lists a
+    # category's articles newest first without joining news to sort. Kept
+    # in step with news by triggers (migration 11) for links not written
+    # through database.ingest.
+    Column("timestamp", DateTime(timezone=True), nullable=True),
 )
 
 
@@ -27,8 +42,31 @@ class Image(Base):
     location = Column(String(500), nullable=False)
     filename = Column(String(255), nullable=False)
     alt_text = Column(String(255), nullable=True)
+    content_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    variants = relationship(
+        "ImageVariant", back_populates="image", cascade="all, delete-orphan"
+    )
+
+
+class ImageVariant(Base):
+    __tablename__ = "image_variants"
+    __table_args__ = (UniqueConstraint("image_id", "name"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(
+        Integer, ForeignKey("images.id", ondelete="CASCADE"), nullable=False
+    )
+    name = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(10), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    image = relationship("Image", back_populates="variants")
+
 
 class Category(Base):
     __tablename__ = "categories"
@@ -51,6 +89,7 @@ class News(Base):
     short_description = Column(String(500), nullable=True)
     image_id = Column(Integer, ForeignKey("images.id"), nullable=True)
     source = Column(String(255), nullable=False)
+    external_id = Column(String(255), nullable=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -59,3 +98,34 @@ class News(Base):
     categories = relationship(
         "Category", secondary=news_categories, back_populates="news_items"
     )
+
+
+class ChangeVersion(Base):
+    __tablename__ = "change_versions"
+
+    scope = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class FeedEntry(Base):
+    """
+    Denormalized copy of the newest articles of each feed (feed 0 is every
+    article, any other id is that category), kept in feed order so a page
+    of titles is one range read with no joins. Maintained by
+    database.feeds on every write.
+    """
+
+    __tablename__ = "feed_entries"
+    __table_args__ = (
+        Index("ix_feed_entries_news_id", "news_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+    feed_id = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    news_id = Column(
+        Integer, ForeignKey("news.id", ondelete="CASCADE"), primary_key=True
+    )
+    title = Column(String(255), nullable=False)
+    short_description = Column(String(500), nullable=True)
+    image_id = Column(Integer, nullable=True)
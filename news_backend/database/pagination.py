@@ -0,0 +1,96 @@
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+from sqlalchemy import desc, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import News
+
+SortKey = Union[datetime, float]
+
+
+def encode_cursor(sort_key: SortKey, news_id: int) -> str:
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    payload = json.dumps([sort_key, news_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[SortKey, int]:
+    """
+    Decode an opaque cursor back into its (sort key, id) position.
+
+    The sort key is a timestamp for chronological listings and a float
+    relevance score for ranked search. Raises ValueError if the cursor was
+    not produced by encode_cursor: besides malformed ones, that rejects
+    scores that are not finite and ids that are not positive integers,
+    which the search index would otherwise turn into shift counts.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, news_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_key, str):
+            sort_key = datetime.fromisoformat(sort_key)
+        elif isinstance(sort_key, (int, float)) and math.isfinite(sort_key):
+            sort_key = float(sort_key)
+        else:
+            raise TypeError(f"Unsupported sort key: {sort_key!r}")
+        if type(news_id) is not int or news_id <= 0:
+            raise TypeError(f"Unsupported id: {news_id!r}")
+        return sort_key, news_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _selects_entity(query) -> bool:
+    descriptions = query.column_descriptions
+    return (
+        len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+    )
+
+
+# Keyset order of chronological listings: (timestamp, id) columns, read
+# newest first. Category listings use the copies in news_categories
+# (database.queries.CATEGORY_ORDER) so their index returns rows in order.
+NEWEST_ORDER = (News.timestamp, News.id)
+
+
+def page_query(query, limit: int, after=None, order=NEWEST_ORDER):
+    """`query` limited to the page after `after` in `order`, plus one row."""
+    timestamp, news_id = order
+    if after is not None:
+        query = query.where(tuple_(timestamp, news_id) < tuple_(*after))
+    return query.order_by(desc(timestamp), desc(news_id)).limit(limit + 1)
+
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    order=NEWEST_ORDER,
+):
+    """
+    Apply keyset pagination on (News.timestamp, News.id), or the equivalent
+    `order` columns, newest first.
+
+    `query` may select News entities or plain columns including
+    News.timestamp and News.id; the page holds entities or rows to match.
+    Returns the page and the cursor for the next page, or None when there
+    are no more rows. One extra row is fetched to detect the end, so no
+    COUNT query is needed.
+    """
+    query = page_query(query, limit, after, order)
+    result = await db.execute(query)
+    rows = (result.scalars() if _selects_entity(query) else result).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+
+    return rows, next_cursor
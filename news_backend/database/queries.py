@@ -0,0 +1,122 @@
+from typing import List, Optional
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from database.models import News, Image, Category, news_categories
+
+# Each builder eager-loads the relationships its DTO touches so a request
+# issues a fixed number of statements regardless of how many rows it returns.
+
+
+def news_titles_query():
+    # Plain row tuples rather than News entities: titles need no
+    # relationships, so there is nothing to gain from the identity map.
+    return select(
+        News.id,
+        News.title,
+        News.short_description,
+        News.image_id,
+        News.timestamp,
+    )
+
+
+def news_summaries_query():
+    # Title fields plus category ids, as carried by live feed events.
+    return select(News).options(
+        load_only(
+            News.id,
+            News.title,
+            News.short_description,
+            News.image_id,
+            News.timestamp,
+        ),
+        selectinload(News.categories).load_only(Category.id),
+    )
+
+
+def news_list_items_query():
+    return select(News).options(
+        load_only(
+            News.id,
+            News.title,
+            News.short_description,
+            News.timestamp,
+            News.source,
+        ),
+        selectinload(News.categories).load_only(Category.id, Category.name),
+    )
+
+
+def news_details_query():
+    return select(News).options(
+        load_only(
+            News.id,
+            News.title,
+            News.description,
+            News.image_id,
+            News.source,
+            News.timestamp,
+            News.created_at,
+        ),
+        selectinload(News.categories).load_only(Category.id, Category.name),
+        joinedload(News.image).load_only(Image.id, Image.location),
+    )
+
+
+# Keyset order for in_category listings (see database.pagination.page_query):
+# the link table's copy of the timestamp, which its category index covers.
+CATEGORY_ORDER = (news_categories.c.timestamp, news_categories.c.news_id)
+
+
+def in_category(query, category_id: int):
+    return query.join(news_categories, news_categories.c.news_id == News.id).where(
+        news_categories.c.category_id == category_id
+    )
+
+
+def top_news_per_category_query(category_ids: List[int], limit_per_category: int):
+    """
+    Newest `limit_per_category` articles of each category in one statement.
+
+    Articles are ranked per category with ROW_NUMBER() over the category
+    index alone and selected by id, so an article that makes the cut in several categories appears once.
+    The result is ordered newest first across all categories.
+    """
+    ranked = (
+        select(
+            news_categories.c.news_id,
+            func.row_number()
+            .over(
+                partition_by=news_categories.c.category_id,
+                order_by=(
+                    desc(news_categories.c.timestamp),
+                    desc(news_categories.c.news_id),
+                ),
+            )
+            .label("rank"),
+        )
+        .where(news_categories.c.category_id.in_(category_ids))
+        .subquery()
+    )
+    top_ids = select(ranked.c.news_id).where(ranked.c.rank <= limit_per_category)
+
+    return (
+        news_list_items_query()
+        .where(News.id.in_(top_ids))
+        .order_by(desc(News.timestamp), desc(News.id))
+    )
+
+
+def news_created_after_query(
+    news_id: int, category_ids: Optional[List[int]], limit: int
+):
+    """
+    The newest `limit` articles with an id above `news_id`, optionally only
+    those in `category_ids`, with their category ids loaded. Used to replay
+    what a live feed client missed while disconnected.
+    """
+    query = news_summaries_query().where(News.id > news_id)
+    if category_ids:
+        query = query.where(News.categories.any(Category.id.in_(category_ids)))
+    return query.order_by(desc(News.id)).limit(limit)
@@ -0,0 +1,154 @@
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import desc, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import News
+from database.pagination import encode_cursor
+
+# Column weights for bm25(): a title hit outranks a summary hit, which
+# outranks a hit deep in the article body.
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+SNIPPET_TOKENS = 16
+
+_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+        title,
+        short_description,
+        description,
+        content='news',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_after_insert AFTER INSERT ON news BEGIN
+        INSERT INTO news_fts(rowid, title, short_description, description)
+        VALUES (new.id, new.title, new.short_description, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_after_delete AFTER DELETE ON news BEGIN
+        INSERT INTO news_fts(news_fts, rowid, title, short_description, description)
+        VALUES ('delete', old.id, old.title, old.short_description, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_after_update
+    AFTER UPDATE OF title, short_description, description ON news
+    WHEN old.title IS NOT new.title
+        OR old.short_description IS NOT new.short_description
+        OR old.description IS NOT new.description
+    BEGIN
+        INSERT INTO news_fts(news_fts, rowid, title, short_description, description)
+        VALUES ('delete', old.id, old.title, old.short_description, old.description);
+        INSERT INTO news_fts(rowid, title, short_description, description)
+        VALUES (new.id, new.title, new.short_description, new.description);
+    END
+    """,
+]
+
+_BM25 = "bm25(news_fts, {}, {}, {})".format(*BM25_WEIGHTS)
+
+_SEARCH_SQL = """
+    SELECT news.id, news.title, news.short_description, news.image_id,
+           {bm25} AS score,
+           snippet(news_fts, -1, '<mark>', '</mark>', '…', {tokens}) AS snippet
+    FROM news_fts
+    JOIN news ON news.id = news_fts.rowid
+    WHERE news_fts MATCH :match {after}
+    ORDER BY score, news.id DESC
+    LIMIT :limit
+"""
+
+_AFTER_SQL = "AND ({bm25} > :score OR ({bm25} = :score AND news.id < :news_id))"
+
+
+def create_search_index(conn: Connection):
+    """
+    Create the FTS5 index over news text and the triggers that keep it in
+    sync with the news table. Idempotent; the index is only rebuilt from
+    existing rows when it is first created.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts'")
+    ).first()
+    for statement in _FTS_SCHEMA:
+        conn.execute(text(statement))
+    if not exists:
+        conn.execute(text("INSERT INTO news_fts(news_fts) VALUES ('rebuild')"))
+
+
+def to_match_expression(q: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression where every word must
+    match as a prefix. Quoting each token keeps FTS5 operators and
+    punctuation in user input from being interpreted as query syntax.
+    """
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+async def search_news(
+    db: AsyncSession, q: str, limit: int, after: Optional[Tuple[float, int]] = None
+):
+    """
+    Relevance-ranked search over title, short description and body.
+
+    Returns the page of row mappings (id, title, short_description,
+    image_id, snippet) and the cursor for the next page. Databases without
+    FTS5 fall back to a title substring match with no ranking.
+    """
+    if db.bind.dialect.name != "sqlite":
+        return await _search_news_by_title(db, q, limit, after)
+
+    match = to_match_expression(q)
+    if match is None:
+        return [], None
+
+    params = {"match": match, "limit": limit + 1}
+    after_sql = ""
+    if after is not None:
+        after_sql = _AFTER_SQL.format(bm25=_BM25)
+        params["score"], params["news_id"] = after
+
+    sql = _SEARCH_SQL.format(bm25=_BM25, tokens=SNIPPET_TOKENS, after=after_sql)
+    rows = (await db.execute(text(sql), params)).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"])
+
+    return rows, next_cursor
+
+
+async def _search_news_by_title(
+    db: AsyncSession, q: str, limit: int, after: Optional[Tuple[float, int]] = None
+):
+    query = select(
+        News.id,
+        News.title,
+        News.short_description,
+        News.image_id,
+    ).where(News.title.ilike(f"%{q}%"))
+    if after is not None:
+        query = query.where(News.id < after[1])
+
+    query = query.order_by(desc(News.id)).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(0.0, rows[-1].id)
+
+    return [{**row._asdict(), "snippet": None} for row in rows], next_cursor
@@ -0,0 +1,101 @@
+from typing import Dict
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import ChangeVersion
+
+# Monotonic per-scope counters bumped by every write that changes what a
+# feed returns. Readers derive validators (ETags) from them instead of
+# re-reading or hashing the data. The bump runs in the writer's own
+# transaction, so every worker process sees it exactly when the data is.
+
+_BUMP_SQL = text(
+    "INSERT INTO change_versions (scope, version) VALUES (:scope, 1) "
+    "ON CONFLICT (scope) DO UPDATE SET version = change_versions.version + 1"
+)
+
+# Categories are only ever written outside the API (seed data, an admin's
+# SQL), so no request handler is there to bump their version; triggers do
+# it in the writing transaction instead. Renaming or deleting a category
+# also changes the category names in every article list and detail, the
+# all-articles and that category's scopes. Scope names are the tags in
+# services.response_cache.
+_CATEGORY_VERSION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS categories_version_after_insert
+    AFTER INSERT ON categories BEGIN
+        INSERT INTO change_versions (scope, version) VALUES ('categories', 1)
+        ON CONFLICT (scope) DO UPDATE SET version = change_versions.version + 1;
+    END
+    """,
+    *(f"""
+    CREATE TRIGGER IF NOT EXISTS categories_version_after_{event.lower()}
+    AFTER {event} ON categories BEGIN
+        INSERT INTO change_versions (scope, version)
+        VALUES ('categories', 1), ('news:newest', 1),
+               ('news:category:' || old.id, 1)
+        ON CONFLICT (scope) DO UPDATE SET version = change_versions.version + 1;
+    END
+    """ for event in ("UPDATE", "DELETE")),
+]
+
+
+# The same for PostgreSQL, as one trigger function.
+_POSTGRES_CATEGORY_VERSION_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION categories_version() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO change_versions (scope, version) VALUES ('categories', 1)
+        ON CONFLICT (scope) DO UPDATE SET version = change_versions.version + 1;
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO change_versions (scope, version)
+            VALUES ('news:newest', 1), ('news:category:' || OLD.id, 1)
+            ON CONFLICT (scope) DO UPDATE
+            SET version = change_versions.version + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS categories_version ON categories",
+    """
+    CREATE TRIGGER categories_version
+    AFTER INSERT OR UPDATE OR DELETE ON categories
+    FOR EACH ROW EXECUTE FUNCTION categories_version()
+    """,
+]
+
+
+async def bump_versions(db: AsyncSession, *scopes: str) -> None:
+    for scope in scopes:
+        await db.execute(_BUMP_SQL, {"scope": scope})
+
+
+async def get_versions(db: AsyncSession, *scopes: str) -> Dict[str, int]:
+    result = await db.execute(
+        select(ChangeVersion.scope, ChangeVersion.version).where(
+            ChangeVersion.scope.in_(scopes)
+        )
+    )
+    versions = dict.fromkeys(scopes, 0)
+    versions.update(result.tuples().all())
+    return versions
+
+
+def create_version_triggers(conn: Connection) -> None:
+    """
+    Create the triggers that version writes to categories. Idempotent.
+    Raises NotImplementedError for databases other than SQLite and
+    PostgreSQL: without the triggers the categories ETag would never
+    change.
+    """
+    if conn.dialect.name == "sqlite":
+        statements = _CATEGORY_VERSION_TRIGGERS
+    elif conn.dialect.name == "postgresql":
+        statements = _POSTGRES_CATEGORY_VERSION_TRIGGERS
+    else:
+        raise NotImplementedError(f"No change-version triggers for {conn.dialect.name}")
+    for statement in statements:
+        conn.execute(text(statement))
@@ -1,6 +1,34 @@
-from database.database import get_db
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional, Type
 
+from fastapi import HTTPException, Query, status
+from database.pagination import decode_cursor
+from dto.news_dto import PaginationDTO
 
-def get_database() -> Session:
-    return next(get_db())
+
+def _pagination_dependency(sort_key_type: Type):
+    def dependency(
+        limit: int = Query(10, ge=1, le=50, description="Number of results to return"),
+        cursor: Optional[str] = Query(
+            None, description="Opaque cursor from a previous response's next_cursor"
+        ),
+    ) -> PaginationDTO:
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+                if not isinstance(after[0], sort_key_type):
+                    raise ValueError("Cursor is not valid for this listing")
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination cursor",
+                )
+        return PaginationDTO(limit=limit, after=after)
+
+    return dependency
+
+
+# Chronological listings page on (timestamp, id), ranked search on (score, id)
+get_pagination = _pagination_dependency(datetime)
+get_search_pagination = _pagination_dependency(float)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 
 
 class CreateNewsDTO(BaseModel):
@@ -10,6 +10,9 @@ class CreateNewsDTO(BaseModel):
     category_ids: List[int] = Field(..., min_length=1)
     source: str = Field(..., max_length=255)
     image_id: Optional[int] = None
+    # The article's id in its source feed. When set, creating the same
+    # (source, external_id) again updates that article instead.
+    external_id: Optional[str] = Field(None, min_length=1, max_length=255)
 
 
 class NewsTitleDTO(BaseModel):
@@ -59,5 +62,5 @@ class MultipleCategoriesRequestDTO(BaseModel):
 
 
 class PaginationDTO(BaseModel):
-    limit: Optional[int] = Field(10, ge=1, le=100)
-    offset: Optional[int] = Field(0, ge=0)
+    limit: int = Field(10, ge=1, le=50)
+    after: Optional[Tuple[Union[datetime, float], int]] = None
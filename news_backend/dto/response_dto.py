@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Any, List
 from datetime import datetime
 
@@ -7,11 +7,15 @@ class SuccessResponseDTO(BaseModel):
     success: bool = True
     message: Optional[str] = None
     data: Optional[Any] = None
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+class PaginatedResponseDTO(SuccessResponseDTO):
+    next_cursor: Optional[str] = None
 
 
 class ErrorResponseDTO(BaseModel):
     success: bool = False
     error: str
     details: Optional[str] = None
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = Field(default_factory=datetime.now)
@@ -1,14 +1,23 @@
 from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
-from database.database import get_db, create_tables
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import get_db, create_tables, SessionLocal, engine, pool_stats
 from contextlib import asynccontextmanager
 import logging
+import os
 from sqlalchemy import text
 
 
 from api.news_api import router as news_router
 from api.category_api import router as category_router
 from api.image_api import router as image_router
+from services.trigram_index import title_index
+from services.response_cache import response_cache
+from services.image_pool import image_pool
+from services.image_files import image_files
+from services.live_feed import live_feed
+from services.compression import CompressionMiddleware
+from services.worker_sync import worker_sync
+from services.metrics import MetricsMiddleware, instrument_engine, metrics_response
 
 # Setup logging
 logging.basicConfig(
@@ -21,11 +30,22 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Create tables on startup
     logger.info("Starting News API Server...")
-    create_tables()
+    await create_tables()
     logger.info("Database tables created successfully")
+    # Started before the index is built so nothing another worker writes
+    # meanwhile is missed.
+    await worker_sync.start()
+    async with SessionLocal() as db:
+        await title_index.build(db)
+    logger.info(f"Title search index built for {len(title_index)} articles")
+    await image_files.load()
+    logger.info(f"Image file table loaded with {len(image_files)} files")
     yield
     # Cleanup on shutdown if needed
     logger.info("Shutting down News API Server...")
+    await worker_sync.stop()
+    image_pool.shutdown()
+    await engine.dispose()
 
 
 app = FastAPI(
@@ -35,6 +55,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(CompressionMiddleware)
+# Added last so it wraps compression and measures the bytes actually sent.
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
 app.include_router(news_router)
 app.include_router(category_router)
 app.include_router(image_router)
@@ -48,6 +73,9 @@ async def root():
         "endpoints": {
             "news": {
                 "create_news": "POST /api/news/",
+                "create_news_bulk": "POST /api/news/bulk",
+                "live_feed": "GET /api/news/stream",
+                "live_feed_websocket": "WS /api/news/stream/ws",
                 "search_news": "GET /api/news/search?q={query}",
                 "titles_by_category": "GET /api/news/by-category/{category}/titles",
                 "titles_by_multiple_categories": "POST /api/news/by-multiple-categories/titles",
@@ -63,6 +91,11 @@ async def root():
                 "get_image_info": "GET /api/images/info/{image_id}",
             },
             "health": "/health",
+            "health_detail": "/health/detail",
+            "metrics": "/metrics",
+            "cache_stats": "/health/cache",
+            "image_pool_stats": "/health/image-pool",
+            "live_feed_stats": "/health/live-feed",
             "docs": "/docs",
             "redoc": "/redoc",
         },
@@ -70,11 +103,44 @@ async def root():
 
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     try:
         # FIXED: Use text() wrapper for raw SQL in SQLAlchemy 2.0+
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+
+
+@app.get("/health/cache")
+async def cache_stats():
+    return {"response_cache": response_cache.stats()}
+
+
+@app.get("/health/image-pool")
+async def image_pool_stats():
+    return {"image_pool": image_pool.stats()}
+
+
+@app.get("/health/live-feed")
+async def live_feed_stats():
+    return {"live_feed": live_feed.stats()}
+
+
+@app.get("/health/detail")
+async def health_detail(db: AsyncSession = Depends(get_db)):
+    health = await health_check(db)
+    return {
+        **health,
+        "worker_pid": os.getpid(),
+        "db_pool": pool_stats(),
+        "response_cache": response_cache.stats(),
+        "image_pool": image_pool.stats(),
+        "live_feed": live_feed.stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
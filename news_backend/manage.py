@@ -0,0 +1,121 @@
+"""
+Maintenance commands, run from this directory:
+
+    python manage.py gc-images [--grace-hours 24] [--dry-run]
+    python manage.py reshard-images [--source DIR] [--concurrency 8]
+    python manage.py rebuild-feeds
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from pathlib import Path
+
+from database.database import SessionLocal, create_tables, engine
+from database.feeds import FEED_SIZE, rebuild_feeds
+from services.image_gc import collect_orphan_images
+from services.storage import IMAGE_STORAGE_LOCATION, LocalShardedStorage, storage
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+
+async def gc_images(args: argparse.Namespace) -> dict:
+    async with SessionLocal() as db:
+        return await collect_orphan_images(
+            db, timedelta(hours=args.grace_hours), dry_run=args.dry_run
+        )
+
+
+async def reshard_images(args: argparse.Namespace) -> dict:
+    """
+    Move image files into the configured storage backend's layout. With
+    local storage this moves files left at the top level of the image
+    directory into their shards; with S3 it copies every file under the
+    source directory into the bucket and leaves the local files in place.
+    """
+    source = Path(args.source)
+    local = isinstance(storage, LocalShardedStorage)
+    if local and source.resolve() == storage.root.resolve():
+        files, move = storage.legacy_files(), True
+    else:
+        files = [
+            path
+            for path in source.rglob("*")
+            if path.is_file() and not path.name.endswith(".part")
+        ]
+        move = False
+
+    counts = {"files": len(files), "stored": 0, "already_stored": 0}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def store(path: Path) -> None:
+        async with semaphore:
+            created = await storage.put_file(path, path.name, move=move)
+        counts["stored" if created else "already_stored"] += 1
+
+    await asyncio.gather(*(store(path) for path in files))
+    return counts
+
+
+async def rebuild_news_feeds(args: argparse.Namespace) -> dict:
+    """Regenerate the precomputed feeds from the news table."""
+    async with engine.begin() as conn:
+        entries = await conn.run_sync(rebuild_feeds)
+    return {"entries": entries, "feed_size": FEED_SIZE}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="News API maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gc = commands.add_parser(
+        "gc-images", help="Delete images no news article references"
+    )
+    gc.add_argument(
+        "--grace-hours",
+        type=float,
+        default=24,
+        help="Keep unreferenced images younger than this (default: 24)",
+    )
+    gc.add_argument("--dry-run", action="store_true", help="Only count orphans")
+    gc.set_defaults(handler=gc_images)
+
+    reshard = commands.add_parser(
+        "reshard-images", help="Move image files into the storage layout"
+    )
+    reshard.add_argument(
+        "--source",
+        default=IMAGE_STORAGE_LOCATION,
+        help="Directory of existing image files (default: IMAGE_STORAGE_LOCATION)",
+    )
+    reshard.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Files stored in parallel (default: 8)",
+    )
+    reshard.set_defaults(handler=reshard_images)
+
+    feeds = commands.add_parser(
+        "rebuild-feeds", help="Regenerate the precomputed newest-per-feed tables"
+    )
+    feeds.set_defaults(handler=rebuild_news_feeds)
+
+    args = parser.parse_args()
+
+    async def run() -> dict:
+        try:
+            await create_tables()
+            return await args.handler(args)
+        finally:
+            await engine.dispose()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
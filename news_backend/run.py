@@ -1,4 +1,143 @@
+"""
+Server launcher, run from this directory:
+
+    python run.py            # production: WEB_CONCURRENCY worker processes
+    python run.py --reload   # development: one process, restarts on changes
+
+In production a gunicorn master creates the tables and applies pending
+migrations once, imports the app, then forks the workers, which share
+the imported code copy-on-write. Each worker runs uvicorn, on uvloop and
+httptools when they are installed.
+
+Signals to the master (its pid is written to PID_FILE when set):
+
+    HUP    start fresh workers and retire the old ones gracefully; picks
+           up configuration and environment changes but not new code
+    USR2   start a new master with new code next to the old one; then
+           send WINCH and TERM to the old master once the new one serves
+    TERM   finish in-flight requests (up to GRACEFUL_TIMEOUT) and exit
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import tempfile
+
 import uvicorn
 
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# Defaults to the CPUs this process may run on, which honours cpusets but
+# not container CPU quotas; set it explicitly under a quota.
+_CPUS = (
+    len(os.sched_getaffinity(0))
+    if hasattr(os, "sched_getaffinity")
+    else os.cpu_count() or 1
+)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(_CPUS)))
+# Seconds a retiring worker gets to finish its requests. Live feed streams
+# outlast it and are closed; their clients reconnect with Last-Event-ID.
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", "5"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()
+PID_FILE = os.getenv("PID_FILE")
+# Where workers keep their Prometheus samples so /metrics covers them all.
+PROMETHEUS_MULTIPROC_DIR = os.getenv(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), f"news-api-metrics-{PORT}"),
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+async def prepare_database() -> None:
+    from database.database import create_tables, engine
+
+    await create_tables()
+    # Pooled connections must not be shared with the forked workers.
+    await engine.dispose()
+
+
+def prepare_metrics_dir() -> None:
+    # prometheus_client reads the variable when it is first imported, so
+    # this has to happen before the app is loaded. A master started by
+    # USR2 (gunicorn passes it GUNICORN_FD) shares the directory with the
+    # old master's workers and leaves it alone.
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = PROMETHEUS_MULTIPROC_DIR
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    if "GUNICORN_FD" in os.environ:
+        return
+    for name in os.listdir(PROMETHEUS_MULTIPROC_DIR):
+        if name.endswith(".db"):
+            os.remove(os.path.join(PROMETHEUS_MULTIPROC_DIR, name))
+
+
+def worker_exited(server, worker) -> None:
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def serve() -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{HOST}:{PORT}",
+                "workers": WEB_CONCURRENCY,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "graceful_timeout": GRACEFUL_TIMEOUT,
+                "keepalive": KEEPALIVE_SECONDS,
+                "loglevel": LOG_LEVEL,
+                "pidfile": PID_FILE,
+                "child_exit": worker_exited,
+            }
+            # Worker heartbeats go through a file; keep it off slow
+            # container overlay filesystems.
+            if os.path.isdir("/dev/shm"):
+                options["worker_tmp_dir"] = "/dev/shm"
+            for name, value in options.items():
+                if value is not None:
+                    self.cfg.set(name, value)
+
+        def load(self):
+            asyncio.run(prepare_database())
+            from main import app
+
+            return app
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    logger.info(f"Starting {WEB_CONCURRENCY} workers on {HOST}:{PORT} ({loop}, {http})")
+    prepare_metrics_dir()
+    # Workers only have each other's articles to catch up with when there
+    # are several; read when the app is loaded, so set it before that.
+    if WEB_CONCURRENCY > 1:
+        os.environ.setdefault("WORKER_SYNC_INTERVAL_SECONDS", "1")
+    Server().run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the News API server")
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="development mode: one process that restarts when code changes",
+    )
+    args = parser.parse_args()
+
+    if args.reload:
+        uvicorn.run("main:app", host=HOST, port=PORT, reload=True, log_level=LOG_LEVEL)
+    else:
+        serve()
+
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    main()
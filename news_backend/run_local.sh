@@ -4,4 +4,4 @@
 export IMAGE_STORAGE_LOCATION="./images"
 mkdir -p ./images
 
-python3 main.py
+python3 run.py --reload
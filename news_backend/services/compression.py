@@ -0,0 +1,176 @@
+import gzip
+import os
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.response_cache import JSON_MEDIA_TYPE, response_cache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies smaller than this are sent as they are; the headers would eat
+# most of the saving.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Bodies at least this large are compressed in the thread pool so a big
+# page does not stall every other request on the event loop. Both zlib
+# and brotli release the GIL while compressing.
+COMPRESSION_THREAD_MIN_BYTES = int(
+    os.getenv("COMPRESSION_THREAD_MIN_BYTES", str(32 * 1024))
+)
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "text/css",
+        "text/html",
+        "text/plain",
+    }
+)
+
+# In order of preference when the client accepts several equally.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The content coding to use for an Accept-Encoding header value, or None
+    to send the body uncompressed.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+async def compress_body(body: bytes, encoding: str) -> bytes:
+    if len(body) >= COMPRESSION_THREAD_MIN_BYTES:
+        return await run_in_threadpool(compress, body, encoding)
+    return compress(body, encoding)
+
+
+def _set_encoded(headers: MutableHeaders, encoding: str, length: int) -> None:
+    headers["Content-Encoding"] = encoding
+    headers["Content-Length"] = str(length)
+    # The compressed bytes differ from the identity ones, so a strong
+    # validator shared between them would be wrong; conditional requests
+    # compare weakly and keep working.
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+async def json_response(
+    request: Request, body: bytes, headers: dict, key: Optional[str] = None
+) -> Response:
+    """
+    A JSON response with `body` compressed for the client. With the
+    response cache `key` the body was stored under, the compressed bytes
+    are kept alongside it, so a hot feed is compressed once per encoding
+    rather than once per request.
+    """
+    response = Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+    response.headers["Vary"] = "Accept-Encoding"
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None or len(body) < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoded = response_cache.get_encoded(key, encoding) if key else None
+    if encoded is None:
+        encoded = await compress_body(body, encoding)
+        if key:
+            response_cache.set_encoded(key, encoding, encoded)
+
+    response.body = encoded
+    _set_encoded(response.headers, encoding, len(encoded))
+    return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses single-body responses of the COMPRESSIBLE_TYPES with Brotli
+    or gzip, as negotiated through Accept-Encoding. Streamed bodies (the
+    live feed, image files) and responses that already carry a
+    Content-Encoding, such as those from json_response, pass through
+    unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(scope=start)
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            body = message.get("body", b"")
+            passthrough = True
+
+            if (
+                media_type not in COMPRESSIBLE_TYPES
+                or "content-encoding" in headers
+                or message.get("more_body", False)
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if encoding is not None and len(body) >= self.minimum_size:
+                body = await compress_body(body, encoding)
+                _set_encoded(headers, encoding, len(body))
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,77 @@
+import hashlib
+from typing import NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.versions import get_versions
+from services.compression import json_response
+from services.response_cache import cache_key, response_cache
+
+# Clients may keep responses but must revalidate them; an unchanged feed
+# then costs one primary-key lookup and an empty 304.
+CACHE_CONTROL = "no-cache"
+
+
+async def compute_etag(db: AsyncSession, request: Request, *scopes: str) -> str:
+    """
+    Strong ETag for `request` built from the change versions of the data
+    scopes the response depends on, plus the path and query parameters
+    so every page and limit has its own validator.
+    """
+    versions = await get_versions(db, *scopes)
+    state = ",".join(f"{scope}={versions[scope]}" for scope in scopes)
+    digest = hashlib.blake2b(
+        f"{cache_key(request)}|{state}".encode(), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+class CachedLookup(NamedTuple):
+    # The response to send right away, if any: a 304 or the cached body.
+    response: Optional[Response]
+    etag: str
+    # Where the body built for this request belongs in the response cache.
+    key: str
+
+
+async def cached_response(
+    db: AsyncSession, request: Request, *scopes: str
+) -> CachedLookup:
+    """
+    Look up a cacheable GET: a 304 when the client's copy is current, else
+    the body cached for the current validator, else only the validator and
+    cache key to build and store a fresh body under.
+    """
+    etag = await compute_etag(db, request, *scopes)
+    if is_not_modified(request, etag):
+        return CachedLookup(not_modified_response(etag), etag, "")
+
+    # Keyed by ETag too, so a body cached before another worker's write
+    # is never served under the newer validator.
+    key = f"{cache_key(request)}#{etag}"
+    cached = response_cache.get(key)
+    if cached is not None:
+        response = await json_response(request, cached, etag_headers(etag), key)
+        return CachedLookup(response, etag, key)
+    return CachedLookup(None, etag, key)
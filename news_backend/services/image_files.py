@@ -0,0 +1,240 @@
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from services.conditional import is_not_modified
+from services.storage import StorageBackend, StoredObject, read_file, storage
+
+IMAGE_FILE_TABLE_MAX_ENTRIES = int(os.getenv("IMAGE_FILE_TABLE_MAX_ENTRIES", "100000"))
+
+# Image filenames are never reused and their bytes never change, so clients
+# and CDNs may keep them for a year without revalidating.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ImageFile(NamedTuple):
+    key: str
+    size: int
+    media_type: str
+    etag: str
+    last_modified: str
+    # Local file holding the bytes, when the storage backend has one.
+    path: Optional[str] = None
+
+
+def _image_file(stored: StoredObject) -> ImageFile:
+    # Names are never reused for different bytes, so the name itself is a
+    # strong validator that is identical on every worker and host.
+    suffix = Path(stored.key).suffix.lower()
+    return ImageFile(
+        key=stored.key,
+        size=stored.size,
+        media_type=MEDIA_TYPES.get(suffix, "application/octet-stream"),
+        etag=f'"{Path(stored.key).stem}"',
+        last_modified=formatdate(stored.mtime, usegmt=True),
+        path=stored.path,
+    )
+
+
+class ImageFileTable:
+    """
+    In-memory table of image file metadata (size, MIME type, ETag), so
+    serving an image needs no storage call on the hot path.
+
+    The table is warmed from the storage backend at startup and updated
+    as files are written. A filename that is not in the table (for example
+    one written by another worker) is looked up once off the loop and then
+    remembered. Entries are evicted least recently used beyond max_entries.
+    """
+
+    def __init__(self, storage: StorageBackend, max_entries: int):
+        self.storage = storage
+        self.max_entries = max_entries
+        self._files: "OrderedDict[str, ImageFile]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    async def load(self) -> None:
+        self._files.clear()
+        for stored in await self.storage.scan(self.max_entries):
+            if Path(stored.key).suffix.lower() in MEDIA_TYPES:
+                self._store(stored.key, _image_file(stored))
+
+    async def add(self, filename: str) -> Optional[ImageFile]:
+        stored = await self.storage.stat(filename)
+        if stored is None:
+            return None
+        image_file = _image_file(stored)
+        self._store(filename, image_file)
+        return image_file
+
+    def discard(self, filename: str) -> None:
+        self._files.pop(filename, None)
+
+    async def lookup(self, filename: str) -> Optional[ImageFile]:
+        image_file = self._files.get(filename)
+        if image_file is not None:
+            self._files.move_to_end(filename)
+            return image_file
+        # Reject anything that is not a plain file name in the directory.
+        if Path(filename).name != filename or filename.startswith("."):
+            return None
+        return await self.add(filename)
+
+    def _store(self, filename: str, image_file: ImageFile) -> None:
+        self._files[filename] = image_file
+        self._files.move_to_end(filename)
+        while len(self._files) > self.max_entries:
+            self._files.popitem(last=False)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range` header into an inclusive (start, end).
+    Returns None for ranges that cannot be satisfied; multi-range requests
+    raise ValueError so the caller can fall back to the full file.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        raise ValueError(f"Unsupported range: {header}")
+    first, last = match.groups()
+    if not first and not last:
+        raise ValueError(f"Unsupported range: {header}")
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+class ImageFileResponse(Response):
+    """
+    Stream all or part of an image file.
+
+    Uses the ASGI pathsend or zero-copy extensions when the server offers
+    them for a local file, so the kernel copies it to the socket; otherwise
+    the bytes are streamed from the storage backend in large chunks.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        image_file: ImageFile,
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        byte_range: Optional[Tuple[int, int]] = None,
+    ):
+        self.image_file = image_file
+        self.status_code = status_code
+        self.media_type = image_file.media_type
+        self.background = None
+        self.start, self.end = byte_range or (0, image_file.size - 1)
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        count = self.end - self.start + 1
+        extensions = scope.get("extensions") or {}
+        if scope.get("method") == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b""})
+        elif (
+            self.image_file.path is not None
+            and "http.response.pathsend" in extensions
+            and count == self.image_file.size
+        ):
+            await send({"type": "http.response.pathsend", "path": self.image_file.path})
+        elif (
+            self.image_file.path is not None and "http.response.zerocopy" in extensions
+        ):
+            async with await anyio.open_file(self.image_file.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": file.wrapped,
+                        "offset": self.start,
+                        "count": count,
+                    }
+                )
+        else:
+            if self.image_file.path is not None:
+                chunks = read_file(self.image_file.path, self.start, self.end)
+            else:
+                chunks = storage.read(self.image_file.key, self.start, self.end)
+            async for chunk in chunks:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+
+def image_response(request: Request, image_file: ImageFile, filename: str) -> Response:
+    """
+    Serve an image with immutable caching headers, answering conditional
+    requests with 304 and single byte ranges with 206.
+    """
+    headers = {
+        "ETag": image_file.etag,
+        "Last-Modified": image_file.last_modified,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    if is_not_modified(request, image_file.etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == image_file.etag):
+        try:
+            byte_range = _parse_range(range_header, image_file.size)
+        except ValueError:
+            # Multi-range and malformed headers are ignored; send it all.
+            return ImageFileResponse(image_file, headers=headers)
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={
+                    "Content-Range": f"bytes */{image_file.size}",
+                    "Accept-Ranges": "bytes",
+                },
+            )
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{image_file.size}"
+        return ImageFileResponse(
+            image_file, status_code=206, headers=headers, byte_range=byte_range
+        )
+
+    return ImageFileResponse(image_file, headers=headers)
+
+
+image_files = ImageFileTable(storage, IMAGE_FILE_TABLE_MAX_ENTRIES)
@@ -0,0 +1,71 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Image, ImageVariant, News
+from services.image_files import image_files
+from services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+
+async def collect_orphan_images(
+    db: AsyncSession, grace: timedelta, dry_run: bool = False
+) -> dict:
+    """
+    Delete images that no news article references, together with their
+    variants and files.
+
+    Images are shared by content hash, so a row is only garbage once no
+    article points at it; `grace` keeps fresh uploads that an editor has
+    not attached to an article yet. The reference check is repeated in
+    the DELETE itself, so an article created meanwhile keeps its image.
+    """
+    cutoff = datetime.now(timezone.utc) - grace
+    unreferenced = ~exists().where(News.image_id == Image.id)
+    orphans = (
+        select(Image.id)
+        .where(unreferenced, Image.created_at < cutoff)
+        .scalar_subquery()
+    )
+
+    if dry_run:
+        count = await db.scalar(select(func.count()).where(Image.id.in_(orphans)))
+        return {"images": count, "files": 0, "dry_run": True}
+
+    deleted = (
+        await db.execute(
+            delete(Image)
+            .where(Image.id.in_(orphans), unreferenced)
+            .returning(Image.id, Image.filename)
+        )
+    ).all()
+    image_ids = [image_id for image_id, _ in deleted]
+    variant_files = []
+    if image_ids:
+        variant_files = (
+            (
+                await db.execute(
+                    delete(ImageVariant)
+                    .where(ImageVariant.image_id.in_(image_ids))
+                    .returning(ImageVariant.filename)
+                )
+            )
+            .scalars()
+            .all()
+        )
+    await db.commit()
+
+    # Rows go first: a crash here leaves stray files, never rows that
+    # point at missing files.
+    filenames = [filename for _, filename in deleted] + list(variant_files)
+    removed = 0
+    for filename in filenames:
+        if await storage.delete(filename):
+            removed += 1
+        image_files.discard(filename)
+
+    logger.info(f"Collected {len(image_ids)} orphan images ({removed} files)")
+    return {"images": len(image_ids), "files": removed, "dry_run": False}
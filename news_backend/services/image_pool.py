@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, Optional, Tuple
+
+# Pillow work is CPU-bound and holds the GIL for most of a decode, so it is
+# kept off the event loop in a separate pool. "process" gives real
+# parallelism; "thread" avoids process start-up and pickling for small
+# deployments.
+IMAGE_POOL_KIND = os.getenv("IMAGE_POOL_KIND", "process")
+IMAGE_POOL_WORKERS = int(
+    os.getenv("IMAGE_POOL_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+IMAGE_POOL_MAX_PENDING = int(
+    os.getenv("IMAGE_POOL_MAX_PENDING", str(IMAGE_POOL_WORKERS * 4))
+)
+IMAGE_POOL_RETRY_AFTER_SECONDS = int(os.getenv("IMAGE_POOL_RETRY_AFTER_SECONDS", "2"))
+
+
+class PoolSaturatedError(Exception):
+    pass
+
+
+class PoolBrokenError(PoolSaturatedError):
+    """
+    A worker of the pool died (killed by the OOM killer, a crash in a
+    decoder). The pool is replaced on the next task, so callers answer it
+    like a saturated pool: 503 and retry.
+    """
+
+
+def _timed_call(fn: Callable, *args) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class ImagePool:
+    """
+    Bounded executor for image tasks.
+
+    At most `max_pending` tasks may be queued or running; beyond that run()
+    raises PoolSaturatedError immediately instead of letting the queue and
+    latency grow without bound. The executor is created on first use so
+    every server worker process gets its own.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown image pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_latency_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="image-pool"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturatedError(
+                f"Image pool saturated ({self.pending} tasks pending)"
+            )
+
+        self.pending += 1
+        self.submitted += 1
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                executor, _timed_call, fn, *args
+            )
+        except BrokenExecutor as e:
+            self.failed += 1
+            # Every task on the broken executor fails; the first to get
+            # here drops it so the next task starts a new one.
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise PoolBrokenError(f"Image pool worker died: {str(e)}") from e
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        latency = time.perf_counter() - started
+        self.completed += 1
+        self.total_run_seconds += run_seconds
+        self.total_wait_seconds += max(0.0, latency - run_seconds)
+        self.max_latency_seconds = max(self.max_latency_seconds, latency)
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_seconds / completed,
+            "avg_run_seconds": self.total_run_seconds / completed,
+            "max_latency_seconds": self.max_latency_seconds,
+        }
+
+
+image_pool = ImagePool(IMAGE_POOL_KIND, IMAGE_POOL_WORKERS, IMAGE_POOL_MAX_PENDING)
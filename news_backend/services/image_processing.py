@@ -0,0 +1,103 @@
+import os
+from typing import Dict, List, Tuple
+
+from PIL import Image as PILImage, ImageOps
+
+# Pure functions over image files. They run in the image worker pool, so
+# they take and return only picklable values and never touch the database.
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(40_000_000)))
+
+
+# Resized derivatives generated for every upload, as name:max_width pairs.
+# Variants never upscale: an original narrower than the target width is
+# only re-encoded.
+IMAGE_VARIANTS: Dict[str, int] = {
+    name.strip(): int(width)
+    for name, width in (
+        item.split(":")
+        for item in os.getenv(
+            "IMAGE_VARIANTS", "thumb:160,medium:480,large:1080"
+        ).split(",")
+        if item.strip()
+    )
+}
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "WEBP").upper()
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+VARIANT_EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
+
+
+class InvalidImageError(Exception):
+    pass
+
+
+def inspect_image(path: str) -> Tuple[str, int, int]:
+    """
+    Validate an image file in one pass and return (format, width, height).
+
+    Pillow reads the header lazily on open, so format and dimensions are
+    checked before verify() walks the rest of the file; the pixels are
+    never decoded into memory.
+    """
+    try:
+        with PILImage.open(path) as pil_image:
+            image_format = pil_image.format
+            width, height = pil_image.size
+            if image_format not in ALLOWED_FORMATS:
+                raise InvalidImageError(f"Unsupported image format: {image_format}")
+            if width * height > MAX_IMAGE_PIXELS:
+                raise InvalidImageError(f"Image too large: {width}x{height}")
+            pil_image.verify()
+    except InvalidImageError:
+        raise
+    except Exception as e:
+        raise InvalidImageError(str(e)) from e
+    return image_format, width, height
+
+
+def generate_variants(
+    source_path: str,
+    targets: List[Tuple[str, int, str]],
+    image_format: str = IMAGE_VARIANT_FORMAT,
+    quality: int = IMAGE_VARIANT_QUALITY,
+) -> List[Tuple[str, int, int]]:
+    """
+    Render resized copies of an image and return (name, width, height) for
+    each of the (name, max_width, destination) targets.
+
+    The source is decoded once; JPEGs are decoded at a reduced scale when
+    the largest target allows it, and each smaller variant is resized from
+    the previous one. Files are written under a temporary name and renamed
+    into place, so a reader never sees a partial variant.
+    """
+    if not targets:
+        return []
+    targets = sorted(targets, key=lambda target: target[1], reverse=True)
+    results = []
+    with PILImage.open(source_path) as pil_image:
+        largest = targets[0][1]
+        pil_image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(pil_image)
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        if has_alpha and image_format != "JPEG":
+            image = image.convert("RGBA")
+        else:
+            image = image.convert("RGB")
+
+        for name, max_width, destination in targets:
+            if image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                image = image.resize((max_width, height), PILImage.LANCZOS)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            temp_path = f"{destination}.part"
+            try:
+                image.save(temp_path, format=image_format, quality=quality)
+                os.replace(temp_path, destination)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            results.append((name, image.width, image.height))
+    return results
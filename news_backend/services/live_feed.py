@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+LIVE_FEED_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "256"))
+LIVE_FEED_HEARTBEAT_SECONDS = float(os.getenv("LIVE_FEED_HEARTBEAT_SECONDS", "15"))
+LIVE_FEED_MAX_SUBSCRIBERS = int(os.getenv("LIVE_FEED_MAX_SUBSCRIBERS", "10000"))
+# Articles replayed to a client reconnecting with Last-Event-ID.
+LIVE_FEED_REPLAY_LIMIT = int(os.getenv("LIVE_FEED_REPLAY_LIMIT", "100"))
+
+
+class LiveFeedFullError(Exception):
+    """Raised when a worker already holds LIVE_FEED_MAX_SUBSCRIBERS streams."""
+
+
+class NewsEvent:
+    """
+    A newly created article, encoded once for every subscriber: `sse` is
+    the complete Server-Sent Events frame and `message` the WebSocket one.
+    """
+
+    __slots__ = ("id", "category_ids", "sse", "message")
+
+    def __init__(self, article: dict, category_ids: Iterable[int]):
+        self.id: int = article["id"]
+        self.category_ids: FrozenSet[int] = frozenset(category_ids)
+        data = json.dumps(
+            {**article, "category_ids": sorted(self.category_ids)},
+            default=str,
+            separators=(",", ":"),
+        )
+        self.sse = f"id: {self.id}\nevent: news\ndata: {data}\n\n".encode()
+        self.message = f'{{"type":"news","article":{data}}}'
+
+
+def news_event(
+    news_id: int,
+    title: str,
+    short_description: Optional[str],
+    image_id: Optional[int],
+    timestamp: datetime,
+    category_ids: Iterable[int],
+) -> NewsEvent:
+    return NewsEvent(
+        {
+            "id": news_id,
+            "title": title,
+            "short_description": short_description,
+            "image_id": image_id,
+            "timestamp": timestamp.isoformat(),
+        },
+        category_ids,
+    )
+
+
+class Subscription:
+    """
+    One client's bounded queue of events. A client that falls
+    LIVE_FEED_QUEUE_SIZE events behind is dropped rather than buffered
+    without limit; it reconnects with Last-Event-ID and catches up from
+    the database.
+    """
+
+    __slots__ = ("category_ids", "queue", "dropped")
+
+    def __init__(self, category_ids: Optional[FrozenSet[int]], max_queue: int):
+        self.category_ids = category_ids
+        self.queue: "asyncio.Queue[Optional[NewsEvent]]" = asyncio.Queue(max_queue)
+        self.dropped = False
+
+    async def next_event(self, timeout: float) -> Optional[NewsEvent]:
+        """
+        The next event, or None when `timeout` passes without one. Raises
+        ConnectionAbortedError once the subscription has been dropped.
+        """
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is None:
+            raise ConnectionAbortedError("Live feed subscriber fell behind")
+        return event
+
+    def drop(self) -> None:
+        # Discard the backlog so the close marker fits in the queue.
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class LiveFeed:
+    """
+    In-process publish/subscribe hub for newly created articles.
+
+    Subscribers are indexed by category, so publishing costs one queue put
+    per interested client and nothing for the rest; an idle subscriber is
+    just a parked coroutine and a small queue. Events are published after
+    the writing transaction commits, by the worker that wrote them.
+    """
+
+    def __init__(self, max_queue: int, max_subscribers: int):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._all: Set[Subscription] = set()
+        self._by_category: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def is_full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def subscribe(self, category_ids: Optional[Iterable[int]] = None) -> Subscription:
+        """
+        Subscribe to every new article, or only to those in `category_ids`.
+        Raises LiveFeedFullError when the worker is at capacity.
+        """
+        if self.is_full:
+            raise LiveFeedFullError(
+                f"Live feed is full ({self.max_subscribers} subscribers)"
+            )
+        categories = frozenset(category_ids) if category_ids else None
+        subscription = Subscription(categories, self.max_queue)
+        if categories is None:
+            self._all.add(subscription)
+        else:
+            for category_id in categories:
+                self._by_category.setdefault(category_id, set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.category_ids is None:
+            if subscription not in self._all:
+                return
+            self._all.discard(subscription)
+        else:
+            removed = False
+            for category_id in subscription.category_ids:
+                subscribers = self._by_category.get(category_id)
+                if subscribers is not None and subscription in subscribers:
+                    removed = True
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_category[category_id]
+            if not removed:
+                return
+        self._count -= 1
+
+    def publish(self, events: Iterable[NewsEvent]) -> None:
+        for event in events:
+            self.published += 1
+            targets = set(self._all)
+            for category_id in event.category_ids:
+                targets.update(self._by_category.get(category_id, ()))
+            for subscription in targets:
+                if subscription.dropped:
+                    continue
+                try:
+                    subscription.queue.put_nowait(event)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    subscription.drop()
+                    self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._count,
+            "max_subscribers": self.max_subscribers,
+            "max_queue": self.max_queue,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped,
+        }
+
+
+live_feed = LiveFeed(LIVE_FEED_QUEUE_SIZE, LIVE_FEED_MAX_SUBSCRIBERS)
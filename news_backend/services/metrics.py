@@ -0,0 +1,204 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Set by run.py for multi-worker servers: every worker writes its samples
+# to files there and /metrics, answered by whichever worker, adds them up.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# Requests that matched no route share one label, so unknown paths cannot
+# grow the number of series.
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter(
+    "news_api_requests_total",
+    "HTTP requests by method, route and status code",
+    ["method", "route", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "news_api_request_duration_seconds",
+    "Time to the last byte of the response",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "news_api_requests_in_progress",
+    "Requests being handled, not counting open live feed streams",
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "news_api_response_size_bytes",
+    "Response body size as sent, after compression",
+    ["route"],
+    buckets=SIZE_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "news_api_request_db_queries",
+    "Database statements executed per request",
+    ["route"],
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "news_api_request_db_seconds",
+    "Time spent in database statements per request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "news_api_db_query_duration_seconds",
+    "Time of each database statement",
+    buckets=QUERY_BUCKETS,
+)
+DB_POOL_IN_USE = Gauge(
+    "news_api_db_pool_connections_in_use",
+    "Database connections checked out of the pool",
+    multiprocess_mode="livesum",
+)
+CACHE_LOOKUPS = Counter(
+    "news_api_response_cache_lookups_total",
+    "Response cache lookups; kind is json for bodies and the content "
+    "coding for their compressed forms",
+    ["kind", "result"],
+)
+
+
+class _DbUsage:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_db_usage: ContextVar[Optional[_DbUsage]] = ContextVar("db_usage", default=None)
+
+
+def record_cache_lookup(kind: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(kind, "hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Time every statement run through `engine`, charge it to the request
+    that ran it, and track pool checkouts. SQLAlchemy runs these hooks in
+    a greenlet that shares the request's context, so the ContextVar set by
+    MetricsMiddleware is visible here.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_DURATION.observe(elapsed)
+        usage = _db_usage.get()
+        if usage is not None:
+            usage.queries += 1
+            usage.seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(context):
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_IN_USE.inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_IN_USE.dec()
+
+
+class MetricsMiddleware:
+    """
+    Records per-route request counts, latency, response size and database
+    usage. The route label is the matched path template, such as
+    /api/news/{news_id}. Live feed streams are counted but left out of the
+    latency and size histograms, where their connection lifetimes would
+    drown out real requests.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = _DbUsage()
+        token = _db_usage.set(usage)
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+        streaming = False
+        REQUESTS_IN_PROGRESS.inc()
+
+        async def send_measured(message: Message) -> None:
+            nonlocal status_code, size, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    streaming = True
+                    REQUESTS_IN_PROGRESS.dec()
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            _db_usage.reset(token)
+            if not streaming:
+                REQUESTS_IN_PROGRESS.dec()
+
+            route = scope.get("route")
+            route = route.path if route is not None else UNMATCHED_ROUTE
+            method = scope["method"]
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            if not streaming:
+                REQUEST_DURATION.labels(method, route).observe(
+                    time.perf_counter() - started
+                )
+                RESPONSE_SIZE.labels(route).observe(size)
+                REQUEST_DB_QUERIES.labels(route).observe(usage.queries)
+                REQUEST_DB_DURATION.labels(route).observe(usage.seconds)
+
+
+def metrics_response() -> Response:
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
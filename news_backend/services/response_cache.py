@@ -0,0 +1,166 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from services.metrics import record_cache_lookup
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+# Bodies and their compressed forms together; a few full-article pages can
+# outweigh a thousand title lists, so entries alone do not bound memory.
+RESPONSE_CACHE_MAX_BYTES = int(
+    os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Invalidation tags. Every cached feed carries the tags of the data it was
+# built from, and writers invalidate exactly those tags.
+NEWEST_TAG = "news:newest"
+CATEGORIES_TAG = "categories"
+
+
+def category_tag(category_id: int) -> str:
+    return f"news:category:{category_id}"
+
+
+# Expiry, body, tags and the body's compressed forms by content coding.
+_Entry = Tuple[float, bytes, Tuple[str, ...], Dict[str, bytes]]
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialized response bodies with a TTL, bounded
+    by entry count and by the bytes of the bodies and compressed forms.
+
+    Entries are stored as the final JSON bytes, so a hit skips the database,
+    the Pydantic models and the encoder, and keep the compressed forms of
+    those bytes as clients ask for them. Each entry is indexed under its
+    tags so writers can drop just the feeds they affected. The cache is
+    per process; feeds include their change-version ETag in the key, so a
+    write made by another worker is never masked by an older entry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            record_cache_lookup("json", False)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        record_cache_lookup("json", True)
+        return entry[1]
+
+    def set(self, key: str, body: bytes, tags: Iterable[str]) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if len(body) > self.max_bytes:
+            return
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, body, tags, {})
+        self.size_bytes += len(body)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        self._evict()
+
+    def get_encoded(self, key: str, encoding: str) -> Optional[bytes]:
+        """The entry's body compressed with `encoding`, if stored already."""
+        entry = self._entries.get(key)
+        body = None
+        if entry is not None and entry[0] >= time.monotonic():
+            body = entry[3].get(encoding)
+        record_cache_lookup(encoding, body is not None)
+        return body
+
+    def set_encoded(self, key: str, encoding: str, body: bytes) -> None:
+        # Dropped silently if the entry was evicted or invalidated meanwhile.
+        entry = self._entries.get(key)
+        if entry is not None:
+            previous = entry[3].get(encoding)
+            entry[3][encoding] = body
+            self.size_bytes += len(body) - (len(previous) if previous else 0)
+            self._evict()
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, set()):
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _evict(self) -> None:
+        # Least recently used first, until both bounds hold.
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, body, tags, encoded = self._entries.pop(key)
+        self.size_bytes -= len(body) + sum(map(len, encoded.values()))
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+def cache_key(request: Request) -> str:
+    params = sorted(request.query_params.multi_items())
+    query = "&".join(f"{name}={value}" for name, value in params)
+    return f"{request.url.path}?{query}"
+
+
+def to_json_bytes(response: BaseModel) -> bytes:
+    # Matches what FastAPI emits for response_model endpoints (field aliases
+    # such as category_id/category_name included).
+    return response.model_dump_json(by_alias=True).encode()
+
+
+response_cache = ResponseCache(
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES
+)
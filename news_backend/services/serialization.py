@@ -0,0 +1,95 @@
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+
+import orjson
+
+# Builds response bodies straight from ORM rows or row tuples into JSON
+# bytes, skipping per-item Pydantic models and FastAPI's response_model
+# re-validation. The shapes match the DTOs in dto/news_dto.py and the
+# SuccessResponseDTO / PaginatedResponseDTO envelope field for field
+# (including the category_id/category_name aliases), so clients cannot
+# tell the two paths apart. orjson writes datetimes in the same ISO 8601
+# form as Pydantic.
+
+
+def success_json(message: str, data: Any) -> bytes:
+    return orjson.dumps(
+        {
+            "success": True,
+            "message": message,
+            "data": data,
+            "timestamp": datetime.now(),
+        }
+    )
+
+
+def paginated_json(message: str, data: Any, next_cursor: Optional[str]) -> bytes:
+    return orjson.dumps(
+        {
+            "success": True,
+            "message": message,
+            "data": data,
+            "timestamp": datetime.now(),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+def categories_data(categories: Iterable) -> List[dict]:
+    return [
+        {"category_id": category.id, "category_name": category.name}
+        for category in categories
+    ]
+
+
+def news_titles_data(items: Iterable) -> List[dict]:
+    return [
+        {
+            "id": item.id,
+            "title": item.title,
+            "short_description": item.short_description,
+            "image_id": item.image_id,
+        }
+        for item in items
+    ]
+
+
+def search_results_data(rows: Iterable) -> List[dict]:
+    return [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "short_description": row["short_description"],
+            "image_id": row["image_id"],
+            "snippet": row["snippet"],
+        }
+        for row in rows
+    ]
+
+
+def news_list_items_data(items: Iterable) -> List[dict]:
+    return [
+        {
+            "id": item.id,
+            "title": item.title,
+            "short_description": item.short_description,
+            "categories": categories_data(item.categories),
+            "timestamp": item.timestamp,
+            "source": item.source,
+        }
+        for item in items
+    ]
+
+
+def news_detail_data(item) -> dict:
+    return {
+        "id": item.id,
+        "title": item.title,
+        "description": item.description,
+        "categories": categories_data(item.categories),
+        "timestamp": item.timestamp,
+        "source": item.source,
+        "created_at": item.created_at,
+        "image_id": item.image_id,
+        "image_location": item.image.location if item.image else None,
+    }
@@ -0,0 +1,325 @@
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+
+# Where image files live. "local" keeps them on disk under
+# IMAGE_STORAGE_LOCATION; "s3" keeps them in an S3-compatible bucket
+# (S3_ENDPOINT_URL points it at MinIO or another stand-in) and uses
+# IMAGE_WORK_DIR for spooled uploads and variant rendering.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+IMAGE_STORAGE_LOCATION = os.getenv("IMAGE_STORAGE_LOCATION", "./images")
+IMAGE_WORK_DIR = os.getenv("IMAGE_WORK_DIR", tempfile.gettempdir())
+S3_BUCKET = os.getenv("S3_BUCKET", "news-images")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+
+READ_CHUNK_SIZE = 256 * 1024
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    mtime: float
+    # Set when the bytes are a local file that can be sent or decoded
+    # directly, without going through read().
+    path: Optional[str] = None
+
+
+async def read_file(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    """Stream bytes start..end (inclusive) of a local file."""
+    remaining = end - start + 1
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+        while remaining > 0:
+            chunk = await file.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def shard(key: str) -> str:
+    """
+    Sharded location of a key: two levels named after its first four
+    characters, e.g. ab/cd/abcdef....jpg. Image names are content hashes
+    (or UUIDs for older uploads), so objects spread evenly.
+    """
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+class StorageBackend(ABC):
+    """
+    Flat key/value store for image files. Keys are the public file names;
+    each backend decides the physical layout. Writes take a finished
+    local file, so uploads and variants are staged in `work_dir` first.
+    """
+
+    work_dir: Path
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[StoredObject]: ...
+
+    @abstractmethod
+    async def put_file(self, source: Path, key: str, move: bool = True) -> bool:
+        """
+        Store a local file under `key`. The source is consumed when `move`
+        is set. Returns False when the key already existed, in which case
+        the stored object is left untouched.
+        """
+
+    @abstractmethod
+    def read(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream bytes start..end (inclusive) of an object."""
+
+    @abstractmethod
+    async def download(self, key: str, destination: Path) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def scan(self, limit: int) -> List[StoredObject]:
+        """List up to `limit` stored objects, for warming metadata caches."""
+
+
+class LocalShardedStorage(StorageBackend):
+    def __init__(self, root: Path):
+        self.root = root
+        self.work_dir = root
+        root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / shard(key)
+
+    def legacy_path(self, key: str) -> Path:
+        # Files uploaded before sharding live at the top level until
+        # `manage.py reshard-images` moves them.
+        return self.root / key
+
+    def _stat(self, key: str) -> Optional[StoredObject]:
+        for path in (self.path_for(key), self.legacy_path(key)):
+            try:
+                stat_result = path.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if path.is_file():
+                return StoredObject(
+                    key, stat_result.st_size, stat_result.st_mtime, str(path)
+                )
+        return None
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        return await run_in_threadpool(self._stat, key)
+
+    def _put_file(self, source: Path, key: str, move: bool) -> bool:
+        destination = self.path_for(key)
+        if destination.exists():
+            if move:
+                source.unlink(missing_ok=True)
+            return False
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            os.replace(source, destination)
+        else:
+            temp_path = destination.with_name(f"{destination.name}.part")
+            shutil.copy2(source, temp_path)
+            os.replace(temp_path, destination)
+        return True
+
+    async def put_file(self, source: Path, key: str, move: bool = True) -> bool:
+        return await run_in_threadpool(self._put_file, source, key, move)
+
+    async def read(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        stored = await self.stat(key)
+        if stored is None:
+            raise FileNotFoundError(key)
+        end = stored.size - 1 if end is None else end
+        async for chunk in read_file(stored.path, start, end):
+            yield chunk
+
+    async def download(self, key: str, destination: Path) -> None:
+        stored = await self.stat(key)
+        if stored is None:
+            raise FileNotFoundError(key)
+        await run_in_threadpool(shutil.copyfile, stored.path, destination)
+
+    def _delete(self, key: str) -> bool:
+        removed = False
+        for path in (self.path_for(key), self.legacy_path(key)):
+            try:
+                path.unlink()
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    async def delete(self, key: str) -> bool:
+        return await run_in_threadpool(self._delete, key)
+
+    def _scan(self, limit: int) -> List[StoredObject]:
+        objects = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".part"):
+                    continue
+                path = Path(directory) / name
+                stat_result = path.stat()
+                objects.append(
+                    StoredObject(
+                        name, stat_result.st_size, stat_result.st_mtime, str(path)
+                    )
+                )
+                if len(objects) >= limit:
+                    return objects
+        return objects
+
+    async def scan(self, limit: int) -> List[StoredObject]:
+        return await run_in_threadpool(self._scan, limit)
+
+    def legacy_files(self) -> List[Path]:
+        """Top-level files left from the flat layout."""
+        return [
+            path
+            for path in self.root.iterdir()
+            if path.is_file() and not path.name.endswith(".part")
+        ]
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible object storage. boto3 is imported on first use so the
+    dependency is only needed when this backend is configured; its
+    blocking calls run in the thread pool.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        work_dir: Path = Path(IMAGE_WORK_DIR),
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.work_dir = work_dir
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError(
+                    "STORAGE_BACKEND=s3 requires boto3 (pip install boto3)"
+                ) from e
+            self._client = boto3.client(
+                "s3", endpoint_url=self.endpoint_url, region_name=self.region
+            )
+        return self._client
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{shard(key)}"
+
+    def _stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(
+            key, head["ContentLength"], head["LastModified"].timestamp()
+        )
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        return await run_in_threadpool(self._stat, key)
+
+    def _put_file(self, source: Path, key: str, move: bool) -> bool:
+        created = self._stat(key) is None
+        if created:
+            self.client.upload_file(str(source), self.bucket, self.object_key(key))
+        if move:
+            source.unlink(missing_ok=True)
+        return created
+
+    async def put_file(self, source: Path, key: str, move: bool = True) -> bool:
+        return await run_in_threadpool(self._put_file, source, key, move)
+
+    async def read(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await run_in_threadpool(
+            self.client.get_object,
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            Range=byte_range,
+        )
+        body = response["Body"]
+        try:
+            while chunk := await run_in_threadpool(body.read, READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    async def download(self, key: str, destination: Path) -> None:
+        await run_in_threadpool(
+            self.client.download_file,
+            self.bucket,
+            self.object_key(key),
+            str(destination),
+        )
+
+    def _delete(self, key: str) -> bool:
+        existed = self._stat(key) is not None
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+        return existed
+
+    async def delete(self, key: str) -> bool:
+        return await run_in_threadpool(self._delete, key)
+
+    def _scan(self, limit: int) -> List[StoredObject]:
+        objects = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                key = item["Key"].rsplit("/", 1)[-1]
+                modified: datetime = item["LastModified"]
+                objects.append(StoredObject(key, item["Size"], modified.timestamp()))
+                if len(objects) >= limit:
+                    return objects
+        return objects
+
+    async def scan(self, limit: int) -> List[StoredObject]:
+        return await run_in_threadpool(self._scan, limit)
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    if backend == "local":
+        return LocalShardedStorage(Path(IMAGE_STORAGE_LOCATION))
+    if backend == "s3":
+        work_dir = Path(IMAGE_WORK_DIR)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        return S3Storage(S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL, S3_REGION, work_dir)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+storage = create_storage()
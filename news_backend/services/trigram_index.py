@@ -0,0 +1,250 @@
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import News
+from database.pagination import encode_cursor
+
+_WORD = re.compile(r"\w+")
+# A posting list switches from sorted ids to a bitmap once more than one
+# in BITMAP_DENSITY news ids is in it and it holds at least BITMAP_MIN_IDS.
+# When it switches, the bitmap takes at most four times the memory of the ids (one bit
+# per news id against four bytes per entry), and search reads it without
+# converting it first.
+BITMAP_DENSITY = 128
+BITMAP_MIN_IDS = 1024
+
+_Postings = Union[array, bytearray]
+
+
+def _normalize(text: str) -> str:
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Titles share most of their words, so the grams of the most recently
+# seen words are kept rather than sliced out again for every title.
+@lru_cache(maxsize=4096)
+def _word_trigrams(word: str) -> FrozenSet[str]:
+    padded = f"  {word} "
+    return frozenset([padded[i : i + 3] for i in range(len(padded) - 2)])
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """
+    Trigrams of every word in `text`, padded the way pg_trgm does it
+    ("  w", " wo", "wor", "ord", "rd ") so short words and word starts
+    still produce matchable grams.
+    """
+    return frozenset().union(*map(_word_trigrams, _WORD.findall(_normalize(text))))
+
+
+def _bits(postings: _Postings) -> int:
+    """A posting list as an int whose bit n is set when news id n is in it."""
+    if isinstance(postings, bytearray):
+        return int.from_bytes(postings, "little")
+    if not postings:
+        return 0
+    bitmap = bytearray((postings[-1] >> 3) + 1)
+    for news_id in postings:
+        bitmap[news_id >> 3] |= 1 << (news_id & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+def _set_bit(bitmap: bytearray, news_id: int) -> None:
+    byte = news_id >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] |= 1 << (news_id & 7)
+
+
+class TrigramIndex:
+    """
+    In-memory inverted index from title trigrams to news ids.
+
+    Trigrams are interned to small integer ids. A trigram's posting list
+    is a sorted `array('I')` of news ids (4 bytes each), or a bitmap once
+    the trigram is common enough for that to be smaller. Each title keeps
+    only the array of its trigram ids, needed to remove it again. Ids are
+    assigned in increasing order, so the common insert is an append.
+    """
+
+    def __init__(self, threshold: float = 0.5):
+        self.threshold = threshold
+        self._gram_ids: Dict[str, int] = {}
+        self._postings: List[_Postings] = []
+        self._grams: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    async def build(self, db: AsyncSession) -> None:
+        self._gram_ids.clear()
+        self._postings.clear()
+        self._grams.clear()
+        result = await db.stream(select(News.id, News.title).order_by(News.id))
+        async for news_id, title in result:
+            self.add(news_id, title)
+
+    def _gram_id(self, gram: str) -> int:
+        gram_id = self._gram_ids.get(gram)
+        if gram_id is None:
+            gram_id = self._gram_ids[gram] = len(self._postings)
+            self._postings.append(array("I"))
+        return gram_id
+
+    def add(self, news_id: int, title: str) -> None:
+        grams = trigrams(title)
+        try:
+            gram_ids = array("I", map(self._gram_ids.__getitem__, grams))
+        except KeyError:
+            gram_ids = array("I", map(self._gram_id, grams))
+        previous = self._grams.get(news_id)
+        if previous is not None:
+            # A redelivered article mostly keeps its title.
+            if set(previous) == set(gram_ids):
+                return
+            self.discard(news_id)
+
+        self._grams[news_id] = gram_ids
+        byte, bit = news_id >> 3, 1 << (news_id & 7)
+        for gram_id in gram_ids:
+            postings = self._postings[gram_id]
+            if type(postings) is bytearray:
+                if byte >= len(postings):
+                    postings.extend(bytes(byte + 1 - len(postings)))
+                postings[byte] |= bit
+                continue
+            if not postings or postings[-1] < news_id:
+                postings.append(news_id)
+            else:
+                postings.insert(bisect_left(postings, news_id), news_id)
+            if (
+                len(postings) >= BITMAP_MIN_IDS
+                and len(postings) * BITMAP_DENSITY > postings[-1]
+            ):
+                bitmap = bytearray()
+                for member in postings:
+                    _set_bit(bitmap, member)
+                self._postings[gram_id] = bitmap
+
+    def discard(self, news_id: int) -> None:
+        for gram_id in self._grams.pop(news_id, ()):
+            postings = self._postings[gram_id]
+            if isinstance(postings, bytearray):
+                postings[news_id >> 3] &= ~(1 << (news_id & 7)) & 0xFF
+                continue
+            index = bisect_left(postings, news_id)
+            if index < len(postings) and postings[index] == news_id:
+                del postings[index]
+
+    def search(
+        self, query: str, limit: int, after: Optional[Tuple[float, int]] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Titles most similar to `query`, as (score, news_id) pairs.
+
+        Similarity is the share of the query's trigrams found in a title
+        (as pg_trgm's word_similarity), so a title still matches through
+        typos as long as enough trigrams survive. Scores are negated so
+        that, like FTS5's bm25(), lower is better and results page on the
+        same (score, id) cursor.
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        query_size = len(query_grams)
+        needed = max(1, math.ceil(self.threshold * query_size))
+
+        # Hits are counted for every title at once: each posting list is
+        # read as a bitmap over news ids and added into a bit-sliced
+        # counter, where counts[i] holds bit i of every title's number of
+        # shared trigrams. That is a few big-int operations per list
+        # however many titles contain its trigram.
+        counts: List[int] = []
+        present = 0
+        for gram in query_grams:
+            gram_id = self._gram_ids.get(gram)
+            if gram_id is None:
+                continue
+            present += 1
+            carry = _bits(self._postings[gram_id])
+            for i, plane in enumerate(counts):
+                counts[i], carry = plane ^ carry, plane & carry
+                if not carry:
+                    break
+            if carry:
+                counts.append(carry)
+        if present < needed:
+            return []
+
+        # Titles sharing more trigrams come first, and within a count the
+        # highest ids, as the (score, id) cursor orders them. A page after
+        # the cursor continues below its count, or at it below its id.
+        top = min(present, (1 << len(counts)) - 1)
+        cursor_shared = cursor_id = None
+        if after is not None:
+            # No title has an id past the widest plane, so a larger cursor
+            # id masks nothing more and only costs memory.
+            cursor_id = min(after[1], max(plane.bit_length() for plane in counts))
+            # Scores run from -1 to 0; clamped so the product stays finite.
+            cursor_shared = round(-max(after[0], -1.0) * query_size)
+            top = min(top, cursor_shared)
+        hits: List[Tuple[float, int]] = []
+        for shared in range(top, needed - 1, -1):
+            matches = -1
+            for i, plane in enumerate(counts):
+                matches &= plane if shared >> i & 1 else ~plane
+            if shared == cursor_shared:
+                matches &= (1 << cursor_id) - 1
+            score = -shared / query_size
+            while matches and len(hits) < limit:
+                news_id = matches.bit_length() - 1
+                matches ^= 1 << news_id
+                hits.append((score, news_id))
+            if len(hits) >= limit:
+                break
+        return hits
+
+
+title_index = TrigramIndex()
+
+
+async def fuzzy_search_news(
+    db: AsyncSession, q: str, limit: int, after: Optional[Tuple[float, int]] = None
+):
+    """
+    Typo-tolerant title search through `title_index`, returning rows shaped
+    like database.search.search_news so the endpoint can serve either.
+    """
+    hits = title_index.search(q, limit + 1, after)
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(*hits[-1])
+
+    ids = [news_id for _, news_id in hits]
+    result = await db.execute(
+        select(News.id, News.title, News.short_description, News.image_id).where(
+            News.id.in_(ids)
+        )
+    )
+    rows = {row.id: row for row in result}
+
+    results = [
+        {**rows[news_id]._asdict(), "score": score, "snippet": None}
+        for score, news_id in hits
+        if news_id in rows
+    ]
+    return results, next_cursor
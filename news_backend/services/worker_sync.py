@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.database import SessionLocal
+from database.models import News
+from database.queries import news_summaries_query
+from database.versions import get_versions
+from services.live_feed import LiveFeed, live_feed, news_event
+from services.response_cache import NEWEST_TAG
+from services.trigram_index import TrigramIndex, title_index
+
+# How often each worker checks for articles written by other workers; 0
+# turns the check off. Off unless set: run.py sets it when it starts more
+# than one worker, and a single process has nothing to catch up with.
+WORKER_SYNC_INTERVAL_SECONDS = float(os.getenv("WORKER_SYNC_INTERVAL_SECONDS", "0"))
+WORKER_SYNC_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _id_ranges(ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """Ids as (first, last) runs of consecutive ids, in order."""
+    ranges: List[Tuple[int, int]] = []
+    for news_id in sorted(ids):
+        if ranges and ranges[-1][1] == news_id - 1:
+            ranges[-1] = (ranges[-1][0], news_id)
+        else:
+            ranges.append((news_id, news_id))
+    return ranges
+
+
+class WorkerSync:
+    """
+    Keeps a worker's in-memory views, the title search index and the live
+    feed, in step with articles written through other worker processes.
+
+    Every write bumps the newest-feed change version, so an idle tick is
+    one primary-key read. When the version moved, articles with ids above
+    the last one seen are added to the index and published, except those
+    this worker wrote itself and already handled (see mark_local). Titles
+    changed by another worker's update are re-indexed through updated_at.
+    New ids are expected in commit order, which holds for SQLite, where
+    writes are serialized.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        index: TrigramIndex,
+        feed: LiveFeed,
+        interval: float,
+    ):
+        self.session_factory = session_factory
+        self.index = index
+        self.feed = feed
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._version = 0
+        self._last_id = 0
+        self._updated_since: Optional[datetime] = None
+        self._local_ids: Set[int] = set()
+        self.synced = 0
+
+    async def start(self) -> None:
+        if self.interval <= 0:
+            return
+        async with self.session_factory() as db:
+            self._version = (await get_versions(db, NEWEST_TAG))[NEWEST_TAG]
+            self._last_id, self._updated_since = (
+                await db.execute(select(func.max(News.id), func.max(News.updated_at)))
+            ).one()
+        self._last_id = self._last_id or 0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def mark_local(self, news_ids: Iterable[int]) -> None:
+        """
+        Record articles this worker created and publishes itself. Call it
+        before the commit: a sync running between the commit and the call
+        would publish them a second time.
+        """
+        if self._task is not None:
+            self._local_ids.update(news_ids)
+
+    def unmark_local(self, news_ids: Iterable[int]) -> None:
+        """Forget marked articles whose transaction rolled back."""
+        self._local_ids.difference_update(news_ids)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with self.session_factory() as db:
+                    await self.sync(db)
+            except Exception as e:
+                logger.error(f"Worker sync failed: {str(e)}")
+
+    async def sync(self, db: AsyncSession) -> None:
+        version = (await get_versions(db, NEWEST_TAG))[NEWEST_TAG]
+        if version == self._version:
+            return
+
+        while True:
+            # A bulk write gives this worker's articles runs of consecutive
+            # ids, so they are left out in a few range conditions instead
+            # of being loaded only to be skipped.
+            query = (
+                news_summaries_query()
+                .where(
+                    News.id > self._last_id,
+                    *(
+                        ~News.id.between(first, last)
+                        for first, last in _id_ranges(self._local_ids)
+                    ),
+                )
+                .order_by(News.id)
+                .limit(WORKER_SYNC_BATCH_SIZE)
+            )
+            news_items = (await db.execute(query)).scalars().all()
+            if not news_items:
+                break
+            events = []
+            for item in news_items:
+                self.index.add(item.id, item.title)
+                events.append(
+                    news_event(
+                        item.id,
+                        item.title,
+                        item.short_description,
+                        item.image_id,
+                        item.timestamp,
+                        [c.id for c in item.categories],
+                    )
+                )
+            self.feed.publish(events)
+            self.synced += len(events)
+            self._last_id = news_items[-1].id
+            self._local_ids = {i for i in self._local_ids if i > self._last_id}
+            if len(news_items) < WORKER_SYNC_BATCH_SIZE:
+                break
+
+        # updated_at has one-second resolution on SQLite, so the last
+        # second is read again next time; re-indexing a title is harmless.
+        query = select(News.id, News.title, News.updated_at)
+        if self._updated_since is not None:
+            query = query.where(News.updated_at >= self._updated_since)
+        else:
+            query = query.where(News.updated_at.is_not(None))
+        for news_id, title, updated_at in (await db.execute(query)).all():
+            self.index.add(news_id, title)
+            if self._updated_since is None or updated_at > self._updated_since:
+                self._updated_since = updated_at
+
+        self._version = version
+
+
+worker_sync = WorkerSync(
+    SessionLocal, title_index, live_feed, WORKER_SYNC_INTERVAL_SECONDS
+)
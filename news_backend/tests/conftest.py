@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+
+# The app reads its configuration at import time, so point it at a
+# throwaway database and image directory before anything imports it.
+_workdir = tempfile.mkdtemp(prefix="news-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/test.db"
+os.environ["IMAGE_STORAGE_LOCATION"] = os.path.join(_workdir, "images")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from database.database import SessionLocal, engine  # noqa: E402
+from database.models import Base, Category  # noqa: E402
+from main import app  # noqa: E402
+from services.response_cache import response_cache  # noqa: E402
+from services.trigram_index import title_index  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def empty_database(client):
+    """Every test starts from empty tables and caches."""
+
+    async def clear():
+        async with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
+        async with SessionLocal() as db:
+            await title_index.build(db)
+
+    client.portal.call(clear)
+    response_cache.clear()
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function on the app's event loop."""
+
+    def run(function, *args):
+        return client.portal.call(function, *args)
+
+    return run
+
+
+@pytest.fixture
+def make_categories(run):
+    def make_categories(*names: str):
+        async def insert():
+            async with SessionLocal() as db:
+                categories = [Category(name=name) for name in names]
+                db.add_all(categories)
+                await db.commit()
+                return [category.id for category in categories]
+
+        return run(insert)
+
+    return make_categories
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@pytest.fixture
+def statements():
+    """Counts the SQL statements sent to the database."""
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
@@ -0,0 +1,110 @@
+from sqlalchemy import text
+
+from database.database import SessionLocal
+from database.models import Category, News
+
+
+def get_categories(client, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get("/api/categories/", headers=headers)
+
+
+def test_categories_written_outside_the_api_change_the_etag(
+    client, run, make_categories
+):
+    first = get_categories(client)
+    assert first.status_code == 200
+    assert get_categories(client, first.headers["ETag"]).status_code == 304
+
+    (politics,) = make_categories("politics")
+    added = get_categories(client, first.headers["ETag"])
+    assert added.status_code == 200
+    assert "politics" in added.text
+
+    async def rename():
+        async with SessionLocal() as db:
+            await db.execute(
+                text("UPDATE categories SET name = 'world' WHERE id = :id"),
+                {"id": politics},
+            )
+            await db.commit()
+
+    run(rename)
+    renamed = get_categories(client, added.headers["ETag"])
+    assert renamed.status_code == 200
+    assert "world" in renamed.text and "politics" not in renamed.text
+
+
+def test_renaming_a_category_changes_article_etags(client, run, make_categories):
+    (politics,) = make_categories("politics")
+    pages = ["/api/news/newest/full", f"/api/news/by-category/{politics}/full"]
+    etags = [client.get(page).headers["ETag"] for page in pages]
+
+    async def rename():
+        async with SessionLocal() as db:
+            await db.execute(
+                text("UPDATE categories SET name = 'world' WHERE id = :id"),
+                {"id": politics},
+            )
+            await db.commit()
+
+    run(rename)
+    for page, etag in zip(pages, etags):
+        assert client.get(page, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_missing_articles_and_categories_are_404_to_conditional_requests(client):
+    for path in [
+        "/api/news/1000000",
+        "/api/news/by-category/1000000/titles",
+        "/api/news/by-category/1000000/full",
+    ]:
+        response = client.get(path, headers={"If-None-Match": "*"})
+        assert response.status_code == 404, path
+
+
+def test_links_written_outside_the_api_keep_the_article_timestamp(
+    client, run, make_categories
+):
+    (politics,) = make_categories("politics")
+
+    async def link_through_the_orm():
+        async with SessionLocal() as db:
+            category = await db.get(Category, politics)
+            db.add(
+                News(
+                    title="Seeded",
+                    description="Body",
+                    source="seed",
+                    categories=[category],
+                )
+            )
+            await db.commit()
+
+    async def link_timestamps():
+        async with SessionLocal() as db:
+            return (
+                await db.execute(
+                    text(
+                        "SELECT news.timestamp, news_categories.timestamp "
+                        "FROM news JOIN news_categories "
+                        "ON news_categories.news_id = news.id"
+                    )
+                )
+            ).all()
+
+    async def move_article():
+        async with SessionLocal() as db:
+            await db.execute(text("UPDATE news SET timestamp = '2001-01-01 00:00:00'"))
+            await db.commit()
+
+    run(link_through_the_orm)
+    response = client.get(f"/api/news/by-category/{politics}/full")
+    assert [item["title"] for item in response.json()["data"]] == ["Seeded"]
+
+    [(news_timestamp, link_timestamp)] = run(link_timestamps)
+    assert link_timestamp is not None and link_timestamp == news_timestamp
+
+    run(move_article)
+    [(news_timestamp, link_timestamp)] = run(link_timestamps)
+    assert link_timestamp == news_timestamp
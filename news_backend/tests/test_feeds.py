@@ -0,0 +1,144 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+from sqlalchemy import desc, select
+
+from api import news_api
+from database import feeds
+from database.database import SessionLocal
+from database.feeds import NEWEST_FEED
+from database.models import FeedEntry, News, news_categories
+
+FEED_SIZE = 5
+
+
+@pytest.fixture(autouse=True)
+def small_feeds(monkeypatch):
+    monkeypatch.setattr(feeds, "FEED_SIZE", FEED_SIZE)
+
+
+def article(index: int, category_ids):
+    return {
+        "title": f"Article {index} v{sum(category_ids)}",
+        "description": f"Body of article {index}",
+        "category_ids": category_ids,
+        "source": "wire",
+        "external_id": f"wire-{index}",
+    }
+
+
+def ingest(client, articles):
+    response = client.post("/api/news/bulk", json=articles)
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["failed"] == 0
+
+
+def assert_feeds_hold_newest_articles(run, feed_ids):
+    async def read():
+        async with SessionLocal() as db:
+            feeds_read = {}
+            for feed_id in feed_ids:
+                entries = (
+                    await db.execute(
+                        select(FeedEntry.news_id, FeedEntry.title)
+                        .where(FeedEntry.feed_id == feed_id)
+                        .order_by(desc(FeedEntry.timestamp), desc(FeedEntry.news_id))
+                    )
+                ).all()
+                newest = select(News.id, News.title)
+                if feed_id != NEWEST_FEED:
+                    newest = newest.join(
+                        news_categories, news_categories.c.news_id == News.id
+                    ).where(news_categories.c.category_id == feed_id)
+                expected = (
+                    await db.execute(
+                        newest.order_by(desc(News.timestamp), desc(News.id)).limit(
+                            FEED_SIZE
+                        )
+                    )
+                ).all()
+                feeds_read[feed_id] = (entries, expected)
+            return feeds_read
+
+    for feed_id, (entries, expected) in run(read).items():
+        assert [tuple(row) for row in entries] == [tuple(row) for row in expected]
+
+
+def test_redelivery_over_a_full_feed_keeps_it_full_and_ordered(
+    client, run, make_categories
+):
+    politics, science = make_categories("politics", "science")
+    ingest(client, [article(i, [politics]) for i in range(12)])
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics])
+
+    # Every article again, then just the ones the feeds hold: the replaced
+    # entries are the oldest entries of each feed, then all of them.
+    ingest(client, [article(i, [politics]) for i in range(12)])
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics])
+    ingest(client, [article(i, [politics]) for i in range(7, 12)])
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics])
+
+    # Articles moving out of a category leave room for older ones.
+    ingest(client, [article(i, [science]) for i in range(9, 12)])
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics, science])
+
+    ingest(client, [article(i, [politics, science]) for i in range(12, 14)])
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics, science])
+
+
+def test_bulk_request_keeps_feeds_whole_across_batches(
+    client, run, make_categories, monkeypatch
+):
+    monkeypatch.setattr(news_api, "NEWS_BULK_BATCH_SIZE", 4)
+    politics, science = make_categories("politics", "science")
+    ingest(client, [article(i, [politics]) for i in range(3)])
+
+    # Articles are created in one batch and updated in a later one, and
+    # more than FEED_SIZE of them land in the same feeds.
+    ingest(
+        client,
+        [article(i, [politics]) for i in range(3, 12)]
+        + [article(i, [science]) for i in range(2, 6)],
+    )
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics, science])
+
+
+def test_feeds_hold_every_committed_batch_when_the_request_dies(
+    client, run, make_categories, monkeypatch
+):
+    monkeypatch.setattr(news_api, "NEWS_BULK_BATCH_SIZE", 4)
+    upsert = news_api.upsert_news_batch
+    calls = []
+
+    async def cancel_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise asyncio.CancelledError()
+        return await upsert(*args)
+
+    monkeypatch.setattr(news_api, "upsert_news_batch", cancel_second_batch)
+    (politics,) = make_categories("politics")
+    # The test client reports the cancelled request as its own error.
+    with pytest.raises(concurrent.futures.CancelledError):
+        client.post("/api/news/bulk", json=[article(i, [politics]) for i in range(8)])
+    assert_feeds_hold_newest_articles(run, [NEWEST_FEED, politics])
+
+
+def test_feeds_short_of_feed_size_answer_their_last_page(client, run, make_categories):
+    politics, science = make_categories("politics", "science")
+    ingest(client, [article(i, [politics]) for i in range(3)])
+    ingest(client, [article(i, [science]) for i in range(3, 3 + FEED_SIZE + 2)])
+
+    async def last_pages():
+        async with SessionLocal() as db:
+            return [await feeds.feed_page(db, feed, 10) for feed in (politics, science)]
+
+    small, full = run(last_pages)
+    rows, next_cursor = small
+    assert [row.title for row in rows] == [
+        f"Article {i} v{politics}" for i in (2, 1, 0)
+    ]
+    assert next_cursor is None
+    # Older articles may have been trimmed from a full feed.
+    assert full is None
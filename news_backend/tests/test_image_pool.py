@@ -0,0 +1,22 @@
+import asyncio
+import os
+
+import pytest
+
+from services.image_pool import ImagePool, PoolBrokenError
+
+
+def test_a_dead_worker_fails_its_task_and_the_pool_recovers():
+    pool = ImagePool("process", 1, 4)
+
+    async def run():
+        with pytest.raises(PoolBrokenError):
+            await pool.run(os._exit, 1)
+        return await pool.run(pow, 2, 10)
+
+    try:
+        assert asyncio.run(run()) == 1024
+    finally:
+        pool.shutdown()
+    assert pool.stats()["failed"] == 1
+    assert pool.pending == 0
@@ -0,0 +1,37 @@
+import io
+
+from PIL import Image as PILImage
+
+from services.image_files import IMMUTABLE_CACHE_CONTROL
+
+
+def upload(client):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (640, 480), "navy").save(buffer, format="PNG")
+    response = client.post(
+        "/api/images/upload",
+        files={"file": ("photo.png", buffer.getvalue(), "image/png")},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["data"]
+
+
+def test_only_file_urls_are_cached_as_immutable(client):
+    image = upload(client)
+    medium = image["variants"]["medium"]
+
+    for url, target in [
+        (f"/api/images/by-id/{image['image_id']}", image["location"]),
+        (f"/api/images/by-id/{image['image_id']}?w=300", medium),
+        (f"{image['location']}?w=300", medium),
+        (f"{image['location']}?variant=medium", medium),
+    ]:
+        response = client.get(url, follow_redirects=False)
+        assert response.status_code == 302, url
+        assert response.headers["Location"] == target
+        assert "immutable" not in response.headers["Cache-Control"]
+
+    for url in (image["location"], medium):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
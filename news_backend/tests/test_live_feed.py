@@ -0,0 +1,28 @@
+from starlette.requests import Request
+
+from api.news_api import stream_news
+from services.live_feed import live_feed
+
+
+def stream_request() -> Request:
+    return Request(
+        {"type": "http", "method": "GET", "path": "/api/news/stream", "headers": []}
+    )
+
+
+def test_streams_subscribe_only_once_the_body_is_sent(run):
+    async def open_and_abandon():
+        response = await stream_news(stream_request(), None, None)
+        connected = len(live_feed)
+        await response.body_iterator.aclose()
+        return connected
+
+    assert run(open_and_abandon) == 0
+    assert len(live_feed) == 0
+
+
+def test_a_full_live_feed_rejects_new_streams(client, monkeypatch):
+    monkeypatch.setattr(live_feed, "max_subscribers", 0)
+    response = client.get("/api/news/stream")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
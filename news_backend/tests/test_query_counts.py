@@ -0,0 +1,47 @@
+import pytest
+
+# Every list and detail endpoint must load categories and images with a
+# fixed number of statements, not one more per article.
+ENDPOINTS = [
+    ("GET", "/api/news/newest/titles?limit=50"),
+    ("GET", "/api/news/by-category/{category}/titles?limit=50"),
+    ("GET", "/api/news/newest/full?limit=50"),
+    ("GET", "/api/news/by-category/{category}/full?limit=50"),
+    ("POST", "/api/news/by-multiple-categories/titles"),
+    ("GET", "/api/news/{news_id}"),
+]
+
+
+def article(index: int, category_ids):
+    return {
+        "title": f"Article {index}",
+        "description": f"Body of article {index}",
+        "category_ids": category_ids,
+        "source": "tests",
+    }
+
+
+@pytest.mark.parametrize("method,url", ENDPOINTS)
+def test_statement_count_does_not_grow_with_articles(
+    client, statements, make_categories, method, url
+):
+    category_ids = make_categories("politics", "science")
+    created = client.post("/api/news/", json=article(0, category_ids))
+    assert created.status_code == 201, created.text
+    url = url.format(category=category_ids[0], news_id=created.json()["data"]["id"])
+    body = {"category_ids": category_ids, "limit_per_category": 50}
+
+    def count() -> int:
+        statements.count = 0
+        response = client.request(method, url, json=body if method == "POST" else None)
+        assert response.status_code == 200, response.text
+        return statements.count
+
+    with_one = count()
+    bulk = client.post(
+        "/api/news/bulk", json=[article(i, category_ids) for i in range(1, 50)]
+    )
+    assert bulk.json()["data"]["created"] == 49
+    with_fifty = count()
+
+    assert with_fifty == with_one
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from database.database import engine
+from database.models import Category, News, news_categories
+from database.pagination import NEWEST_ORDER, page_query
+from database.queries import (
+    CATEGORY_ORDER,
+    in_category,
+    news_details_query,
+    news_titles_query,
+    top_news_per_category_query,
+)
+
+# Plans are checked on a database that has never been analyzed, which is
+# what a new deployment runs with: no page may sort a whole category or
+# the whole news table to return its rows.
+LISTINGS = {
+    "newest titles": (lambda: news_titles_query(), NEWEST_ORDER),
+    "newest full": (lambda: news_details_query(), NEWEST_ORDER),
+    "category titles": (lambda: in_category(news_titles_query(), 3), CATEGORY_ORDER),
+    "category full": (lambda: in_category(news_details_query(), 3), CATEGORY_ORDER),
+}
+
+
+@pytest.fixture
+def articles(run):
+    async def insert_articles():
+        now = datetime.utcnow()
+        async with engine.begin() as conn:
+            await conn.execute(insert(Category), [{"name": f"c{i}"} for i in range(8)])
+            await conn.execute(
+                insert(News),
+                [
+                    {
+                        "id": i + 1,
+                        "title": f"Article {i}",
+                        "description": "Body",
+                        "source": "tests",
+                        "timestamp": now - timedelta(seconds=i),
+                    }
+                    for i in range(2000)
+                ],
+            )
+            await conn.execute(
+                insert(news_categories),
+                [
+                    {
+                        "news_id": i + 1,
+                        "category_id": 1 + i % 8,
+                        "timestamp": now - timedelta(seconds=i),
+                    }
+                    for i in range(2000)
+                ],
+            )
+        return now
+
+    return run(insert_articles)
+
+
+def query_plan(run, query):
+    async def explain():
+        async with engine.connect() as conn:
+            compiled = query.compile(
+                conn.sync_engine, compile_kwargs={"render_postcompile": True}
+            )
+            parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}", parameters
+            )
+            return [row[-1] for row in result]
+
+    return run(explain)
+
+
+@pytest.mark.parametrize("listing", LISTINGS)
+@pytest.mark.parametrize("deep", [False, True], ids=["first page", "later page"])
+def test_pages_are_read_in_index_order(run, articles, listing, deep):
+    make_query, order = LISTINGS[listing]
+    after = (articles - timedelta(seconds=500), 501) if deep else None
+
+    plan = query_plan(run, page_query(make_query(), 50, after, order))
+
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    if order is CATEGORY_ORDER:
+        assert any("ix_news_categories_category_timestamp" in step for step in plan)
+    else:
+        assert any("ix_news_newest_covering" in step for step in plan), plan
+
+
+def test_top_news_per_category_ranks_from_the_category_index(run, articles):
+    plan = query_plan(run, top_news_per_category_query([1, 2], 10))
+
+    assert any("ix_news_categories_category_timestamp" in step for step in plan), plan
@@ -0,0 +1,26 @@
+from services.response_cache import ResponseCache
+
+
+def test_compressed_forms_count_towards_the_byte_budget():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, max_bytes=1000)
+    cache.set("a", b"x" * 400, ["t"])
+    cache.set("b", b"x" * 400, ["t"])
+    assert cache.size_bytes == 800
+
+    # Compressing "b" takes the cache over budget, so "a", used least
+    # recently, goes.
+    cache.set_encoded("b", "br", b"x" * 300)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"x" * 400
+    assert cache.size_bytes == 700
+
+    cache.invalidate("t")
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_a_body_over_the_budget_is_not_cached():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, max_bytes=100)
+    cache.set("small", b"x" * 50, [])
+    cache.set("large", b"x" * 101, [])
+    assert cache.get("large") is None
+    assert cache.get("small") == b"x" * 50
@@ -0,0 +1,104 @@
+import base64
+import math
+import random
+import string
+
+import pytest
+
+from services import trigram_index
+from services.trigram_index import TrigramIndex, trigrams
+
+WORDS = [
+    "".join(random.Random(n).choices(string.ascii_lowercase, k=6)) for n in range(40)
+]
+
+
+def brute_force(titles, query, threshold=0.5):
+    query_grams = trigrams(query)
+    needed = max(1, math.ceil(threshold * len(query_grams)))
+    scored = []
+    for news_id, title in titles.items():
+        shared = len(query_grams & trigrams(title))
+        if shared >= needed:
+            scored.append((-shared / len(query_grams), -news_id))
+    return [(score, -negated_id) for score, negated_id in sorted(scored)]
+
+
+def all_pages(index, query, page_size=7):
+    results, after = [], None
+    while True:
+        page = index.search(query, page_size + 1, after)
+        results += page[:page_size]
+        if len(page) <= page_size:
+            return results
+        after = page[page_size - 1]
+
+
+@pytest.fixture(params=[False, True], ids=["sorted ids", "bitmaps"])
+def index(request, monkeypatch):
+    if request.param:
+        # Make every common trigram's posting list a bitmap.
+        monkeypatch.setattr(trigram_index, "BITMAP_MIN_IDS", 8)
+        monkeypatch.setattr(trigram_index, "BITMAP_DENSITY", 64)
+    return TrigramIndex()
+
+
+def test_finds_titles_through_typos(index):
+    index.add(1, "Central bank raises interest rates")
+    index.add(2, "Local team wins the championship")
+
+    assert [news_id for _, news_id in index.search("intrest rtaes", 10)] == [1]
+
+
+def test_matches_brute_force_across_pages_updates_and_removals(index):
+    rng = random.Random(3)
+    titles = {}
+    for news_id in range(1, 600):
+        titles[news_id] = " ".join(rng.choices(WORDS, k=rng.randint(3, 7)))
+        index.add(news_id, titles[news_id])
+    for news_id in rng.sample(sorted(titles), 60):
+        titles[news_id] = " ".join(rng.choices(WORDS, k=4))
+        index.add(news_id, titles[news_id])
+    for news_id in rng.sample(sorted(titles), 20):
+        index.add(news_id, titles[news_id])
+    for news_id in rng.sample(sorted(titles), 40):
+        del titles[news_id]
+        index.discard(news_id)
+
+    assert len(index) == len(titles)
+    for _ in range(30):
+        query = " ".join(rng.sample(WORDS, 2))
+        query = query[:-1] + "x"
+        assert all_pages(index, query) == brute_force(titles, query)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"[-0.5,-1]",
+        b"[-0.5,0]",
+        b"[-0.5,2.5]",
+        b'[-0.5,"7"]',
+        b"[Infinity,1]",
+        b"[-Infinity,1]",
+        b"[NaN,1]",
+        b"[-1e400,1]",
+    ],
+)
+def test_search_rejects_cursors_it_did_not_issue(client, payload):
+    cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    response = client.get(
+        "/api/news/search", params={"q": "markets", "mode": "fuzzy", "cursor": cursor}
+    )
+    assert response.status_code == 400
+
+
+def test_cursor_ids_past_the_index_cost_nothing_extra(index):
+    titles = {news_id: "Markets rally on rate cut" for news_id in range(1, 6)}
+    for news_id, title in titles.items():
+        index.add(news_id, title)
+    first = index.search("markets rally", 10)
+    score = first[0][0]
+    assert index.search("markets rally", 10, (score, 10**12)) == first
+    # Scores below the lowest possible one resume at the best matches.
+    assert index.search("markets rally", 10, (-1e308, 3)) == [(score, 2), (score, 1)]
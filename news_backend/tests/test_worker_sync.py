@@ -0,0 +1,75 @@
+import pytest
+
+from database.database import SessionLocal
+from services.trigram_index import TrigramIndex
+from services.worker_sync import WorkerSync
+
+
+class RecordingFeed:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, events):
+        self.published.extend(event.id for event in events)
+
+
+@pytest.fixture
+def worker(run):
+    # Another worker's view of the database; the app's own sync is off in
+    # a single process. A long interval keeps its loop from running.
+    worker = WorkerSync(SessionLocal, TrigramIndex(), RecordingFeed(), 3600)
+    run(worker.start)
+    yield worker
+    run(worker.stop)
+
+
+def sync(run, worker):
+    async def sync():
+        async with SessionLocal() as db:
+            await worker.sync(db)
+
+    run(sync)
+
+
+def create(client, category_ids, count):
+    response = client.post(
+        "/api/news/bulk",
+        json=[
+            {
+                "title": f"Article {i}",
+                "description": "Body",
+                "category_ids": category_ids,
+                "source": "tests",
+            }
+            for i in range(count)
+        ],
+    )
+    return [result["id"] for result in response.json()["data"]["results"]]
+
+
+def test_publishes_other_workers_articles_once_and_skips_local_ones(
+    client, run, make_categories, worker
+):
+    category_ids = make_categories("politics")
+    ids = create(client, category_ids, 6)
+    worker.mark_local(ids[:2] + ids[3:5])
+
+    sync(run, worker)
+    assert worker.feed.published == [ids[2], ids[5]]
+    assert len(worker.index) == 2
+
+    later = create(client, category_ids, 2)
+    worker.mark_local(later[:1])
+    sync(run, worker)
+    assert worker.feed.published == [ids[2], ids[5], later[1]]
+
+
+def test_unmarked_articles_are_published(client, run, make_categories, worker):
+    category_ids = make_categories("politics")
+    worker.mark_local([1_000_000])
+    ids = create(client, category_ids, 2)
+    worker.mark_local(ids)
+    worker.unmark_local(ids[1:])
+
+    sync(run, worker)
+    assert worker.feed.published == ids[1:]